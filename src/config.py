@@ -29,6 +29,9 @@ class Config:
     # Timing
     TRADING_INTERVAL: int = int(os.getenv('TRADING_INTERVAL', '300'))  # 5 minutes
     
+    # Concurrency
+    FETCH_WORKERS: int = int(os.getenv('FETCH_WORKERS', '16'))  # Parallel market data fetches
+    
     # Strategy Weights (auto-adjusted based on performance)
     STRATEGY_WEIGHTS: Dict[str, float] = {
         'llm': 0.30,
@@ -42,6 +45,7 @@ class Config:
     LLM_MODEL: str = os.getenv('LLM_MODEL', 'claude-sonnet-4-20250514')
     LLM_MAX_TOKENS: int = int(os.getenv('LLM_MAX_TOKENS', '1000'))
     LLM_TEMPERATURE: float = float(os.getenv('LLM_TEMPERATURE', '0.7'))
+    LLM_CACHE_TTL: float = float(os.getenv('LLM_CACHE_TTL', '3600'))  # Seconds to reuse an analysis
     
     # Risk Management
     KELLY_FRACTION: float = float(os.getenv('KELLY_FRACTION', '0.25'))
@@ -50,7 +54,8 @@ class Config:
     # Data Storage
     DATA_DIR: str = os.getenv('DATA_DIR', 'data')
     PERFORMANCE_FILE: str = os.path.join(DATA_DIR, 'performance.json')
-    TRADES_FILE: str = os.path.join(DATA_DIR, 'trades.json')
+    TRADES_FILE: str = os.path.join(DATA_DIR, 'trades.jsonl')  # One JSON record per line
+    OUTCOMES_FILE: str = os.path.join(DATA_DIR, 'outcomes.jsonl')  # Resolved trades for weight fitting
     
     # API Endpoints
     MANIFOLD_API_BASE: str = 'https://api.manifold.markets'
@@ -2,15 +2,20 @@
 Strategy Ensemble Manager
 Combines multiple strategies with weighted voting
 """
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, Union
 import logging
-import sys
-from pathlib import Path
-
-# Add parent directory to path for imports
-sys.path.insert(0, str(Path(__file__).parent))
+import math
+from functools import partial
+import numpy as np
 
 from strategies.base_strategy import BaseStrategy, StrategySignal
+from utils.market_view import MarketView
+
+try:
+    from scipy.optimize import nnls
+    HAS_SCIPY = True
+except ImportError:
+    HAS_SCIPY = False
 
 logger = logging.getLogger(__name__)
 
@@ -21,40 +26,102 @@ class StrategyEnsemble:
     def __init__(self, strategies: List[BaseStrategy], weights: Dict[str, float] = None):
         self.strategies = {s.name: s for s in strategies}
         self.weights = weights or {s.name: 1.0 / len(strategies) for s in strategies}
+        self.perf_history: List[Tuple[Dict[str, float], float]] = []  # (strategy probabilities, outcome)
         self._normalize_weights()
     
     def _normalize_weights(self):
         """Normalize weights to sum to 1.0"""
         total = sum(self.weights.values())
-        if total > 0:
+        if total > 0 and not math.isclose(total, 1.0):
             self.weights = {k: v / total for k, v in self.weights.items()}
+        self._cache_weight_vector()
+    
+    def _cache_weight_vector(self):
+        """Align weights with strategy order so combining signals needs no dict lookups"""
+        self._weight_names = list(self.strategies)
+        self._weight_columns = {name: j for j, name in enumerate(self._weight_names)}
+        self._weight_vec = np.array([self.weights.get(name, 0) for name in self._weight_names])
     
     def analyze(self, market: Dict[str, Any], **kwargs) -> Optional[StrategySignal]:
         """Get signals from all strategies and combine them"""
+        return self.analyze_batch([market], [kwargs])[0]
+    
+    def analyze_batch(
+        self,
+        markets: List[Dict[str, Any]],
+        contexts: List[Dict[str, Any]],
+        min_edge: float = 0.0,
+        return_grid: bool = False
+    ) -> Union[
+        List[Optional[StrategySignal]],
+        Tuple[List[Optional[StrategySignal]], List[Dict[str, StrategySignal]]]
+    ]:
+        """
+        Analyze many markets and combine their signals in one vectorized pass
+        
+        Args:
+            markets: Market data dictionaries
+            contexts: Per-market keyword arguments for the strategies
+                (probability_history, comments, bets)
+            min_edge: Drop markets whose consensus is closer than this to the market price
+            return_grid: Also return each market's individual strategy signals
         
-        signals = {}
+        Returns:
+            One consensus signal (or None) per market, in input order; with
+            return_grid, a (consensus signals, strategy signals by name) tuple
+        """
+        grid: List[Dict[str, StrategySignal]] = [{} for _ in markets]
+        
+        # Typed view of each market, built once and shared by the strategies that read it
+        contexts = [
+            {**context, 'view': MarketView.from_raw(market)}
+            for market, context in zip(markets, contexts)
+        ]
         
         # Collect signals from all enabled strategies
         for name, strategy in self.strategies.items():
             if not strategy.enabled:
                 continue
             
-            try:
-                signal = strategy.analyze(market, **kwargs)
+            debug = logger.isEnabledFor(logging.DEBUG)
+            for row, signal in zip(grid, self._strategy_signals(name, strategy, markets, contexts)):
                 if signal:
-                    signals[name] = signal
-                    logger.debug(f"{name} signal: {signal.direction} @ {signal.probability:.2%} "
-                               f"(confidence: {signal.confidence:.2%})")
-            except Exception as e:
-                logger.error(f"Error in {name} strategy: {e}")
+                    row[name] = signal
+                    if debug:
+                        logger.debug(f"{name} signal: {signal.direction} @ {signal.probability:.2%} "
+                                   f"(confidence: {signal.confidence:.2%})")
         
-        if not signals:
-            return None
+        market_probs = np.array([market.get('probability', 0.5) for market in markets])
+        signals = self._combine_grid(grid, market_probs, min_edge)
+        if return_grid:
+            return signals, grid
+        return signals
+    
+    def _strategy_signals(
+        self,
+        name: str,
+        strategy: BaseStrategy,
+        markets: List[Dict[str, Any]],
+        contexts: List[Dict[str, Any]]
+    ) -> List[Optional[StrategySignal]]:
+        """Run one strategy over all markets, batched when the strategy supports it"""
         
-        # Combine signals using weighted voting
-        combined_signal = self._combine_signals(signals)
+        analyze_batch = getattr(strategy, 'analyze_batch', None)
+        if analyze_batch is not None:
+            try:
+                return analyze_batch(markets, contexts)
+            except Exception as e:
+                logger.error(f"Error in {name} strategy: {e}")
+                return [None] * len(markets)
         
-        return combined_signal
+        signals = []
+        for market, context in zip(markets, contexts):
+            try:
+                signals.append(strategy.analyze(market, **context))
+            except Exception as e:
+                logger.error(f"Error in {name} strategy: {e}")
+                signals.append(None)
+        return signals
     
     def _combine_signals(self, signals: Dict[str, StrategySignal]) -> Optional[StrategySignal]:
         """Combine multiple signals into one consensus signal"""
@@ -62,58 +129,94 @@ class StrategyEnsemble:
         if not signals:
             return None
         
-        # Weighted probability estimate
-        total_weight = 0
-        weighted_prob = 0
-        weighted_confidence = 0
+        return self._combine_grid([signals])[0]
+    
+    def _combine_grid(
+        self,
+        grid: List[Dict[str, StrategySignal]],
+        market_probs: Optional[np.ndarray] = None,
+        min_edge: float = 0.0
+    ) -> List[Optional[StrategySignal]]:
+        """Combine per-market signal dicts into consensus signals, one row per market"""
         
-        yes_votes = 0
-        no_votes = 0
+        names = self._weight_names
+        columns = self._weight_columns
         
-        for name, signal in signals.items():
-            weight = self.weights.get(name, 0) * signal.confidence
-            total_weight += weight
-            
-            weighted_prob += signal.probability * weight
-            weighted_confidence += signal.confidence * weight
-            
-            if signal.direction == 'YES':
-                yes_votes += weight
-            else:
-                no_votes += weight
+        # Stack signals into (n_markets, n_strategies) matrices; missing signals get zero weight
+        shape = (len(grid), len(names))
+        P = np.zeros(shape)
+        C = np.zeros(shape)
+        D = np.zeros(shape, dtype=bool)
+        for i, signals in enumerate(grid):
+            for name, signal in signals.items():
+                j = columns[name]
+                P[i, j] = signal.probability
+                C[i, j] = signal.confidence
+                D[i, j] = signal.direction == 'YES'
         
-        if total_weight == 0:
-            return None
+        # Weights scaled by each signal's confidence
+        W = self._weight_vec * C
+        total_weight = W.sum(axis=1)
+        valid = total_weight > 0
+        total_weight = np.where(valid, total_weight, 1.0)
         
         # Calculate consensus
-        consensus_prob = weighted_prob / total_weight
-        consensus_confidence = weighted_confidence / total_weight
-        consensus_direction = 'YES' if yes_votes > no_votes else 'NO'
+        consensus_prob = np.einsum('ij,ij->i', P, W) / total_weight
+        consensus_confidence = np.einsum('ij,ij->i', C, W) / total_weight
+        
+        yes_votes = np.einsum('ij,ij->i', D, W)
+        no_votes = total_weight - yes_votes
         
         # Calculate agreement strength
-        agreement = abs(yes_votes - no_votes) / total_weight
+        agreement = np.abs(yes_votes - no_votes) / total_weight
         
-        # Build reasoning
+        if market_probs is not None:
+            valid &= np.abs(consensus_prob - market_probs) >= min_edge
+        
+        results: List[Optional[StrategySignal]] = [None] * len(grid)
+        for i in np.flatnonzero(valid):
+            results[i] = StrategySignal(
+                probability=float(consensus_prob[i]),
+                confidence=float(consensus_confidence[i]),
+                direction='YES' if yes_votes[i] > no_votes[i] else 'NO',
+                reasoning=partial(self._build_reasoning, grid[i], self._weight_vec),
+                strength=float(agreement[i])
+            )
+        
+        return results
+    
+    def _build_reasoning(self, signals: Dict[str, StrategySignal], weight_vec: np.ndarray) -> str:
+        """Summarize the contributing signals with the weights they were combined with"""
         reasoning_parts = []
         for name, signal in signals.items():
-            weight_pct = self.weights.get(name, 0) * 100
+            weight_pct = weight_vec[self._weight_columns[name]] * 100
             reasoning_parts.append(
                 f"{name} ({weight_pct:.0f}%): {signal.direction} @ {signal.probability:.1%}"
             )
         
-        reasoning = "Ensemble: " + "; ".join(reasoning_parts)
+        return "Ensemble: " + "; ".join(reasoning_parts)
+    
+    def record_outcome(self, strategy_probabilities: Dict[str, float], outcome: bool):
+        """
+        Record a resolved trade for weight fitting
         
-        return StrategySignal(
-            probability=consensus_prob,
-            confidence=consensus_confidence,
-            direction=consensus_direction,
-            reasoning=reasoning,
-            strength=agreement
-        )
+        Args:
+            strategy_probabilities: Probability each strategy predicted for the market
+            outcome: True if the market resolved YES
+        """
+        self.perf_history.append((dict(strategy_probabilities), float(outcome)))
     
     def update_weights(self, performance_data: Dict[str, Dict]):
         """Update strategy weights based on performance"""
         
+        # Least-squares fit against resolved outcomes once there is enough history
+        fitted = self._fit_weights()
+        if fitted:
+            self.weights = fitted
+            self._cache_weight_vector()
+            logger.info(f"Updated strategy weights: {self.weights}")
+            return
+        
         # Calculate performance scores
         scores = {}
         for name, perf in performance_data.items():
@@ -136,8 +239,38 @@ class StrategyEnsemble:
             total_score = sum(scores.values())
             if total_score > 0:
                 self.weights = {name: score / total_score for name, score in scores.items()}
+                self._cache_weight_vector()
                 logger.info(f"Updated strategy weights: {self.weights}")
     
+    def _fit_weights(self) -> Optional[Dict[str, float]]:
+        """
+        Solve for non-negative weights minimizing ||S w - o||
+        
+        S holds each strategy's predicted probability per resolved trade (0.5 when
+        the strategy had no signal) and o the realized outcomes.
+        
+        Returns:
+            Normalized weights, or None if there are fewer trades than strategies
+            or the fit is degenerate
+        """
+        names = list(self.strategies)
+        if not names or len(self.perf_history) < len(names):
+            return None
+        
+        S = np.array([[probs.get(name, 0.5) for name in names] for probs, _ in self.perf_history])
+        o = np.array([outcome for _, outcome in self.perf_history])
+        
+        if HAS_SCIPY:
+            w, _ = nnls(S, o)
+        else:
+            w = np.clip(np.linalg.lstsq(S, o, rcond=None)[0], 0, None)
+        
+        total = w.sum()
+        if total <= 0:
+            return None
+        
+        return {name: float(weight / total) for name, weight in zip(names, w)}
+    
     def get_strategy_performance(self) -> Dict[str, Dict]:
         """Get performance metrics for all strategies"""
         return {
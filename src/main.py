@@ -7,7 +7,8 @@ import json
 import logging
 import os
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set, Tuple
+from concurrent.futures import ThreadPoolExecutor
 import sys
 import argparse
 
@@ -15,9 +16,11 @@ from config import Config
 from manifold_client import ManifoldClient
 from ensemble import StrategyEnsemble
 from risk_manager import RiskManager
+from strategies.base_strategy import StrategySignal
 from strategies.llm_strategy import LLMStrategy
 from strategies.momentum_strategy import MomentumStrategy
 from strategies.contrarian_strategy import ContrarianStrategy
+from utils.serialization import json_dumps, json_loads
 
 # Setup logging
 logging.basicConfig(
@@ -52,10 +55,21 @@ class TradingBot:
         strategies = self._init_strategies()
         self.ensemble = StrategyEnsemble(strategies, config.STRATEGY_WEIGHTS)
         
+        # Make sure the data files have somewhere to go before any save
+        for path in (config.PERFORMANCE_FILE, config.TRADES_FILE, config.OUTCOMES_FILE):
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        
         # Load historical data
         self.performance_data = self._load_performance_data()
         self.trades_history = self._load_trades_history()
         
+        # Replay resolved trades so weight fitting picks up where it left off;
+        # trades are keyed by (market_id, timestamp) so each is recorded once
+        self._recorded_outcomes: Set[Tuple[str, str]] = set()
+        for record in self._load_outcomes():
+            self.ensemble.record_outcome(record['strategy_probabilities'], record['outcome'])
+            self._recorded_outcomes.add((record['market_id'], record['trade_timestamp']))
+        
         logger.info(f"Trading Bot initialized (dry_run={dry_run})")
         logger.info(f"Target user: {config.TARGET_USER}")
         logger.info(f"Active strategies: {[s.name for s in strategies if s.enabled]}")
@@ -70,7 +84,8 @@ class TradingBot:
                 api_key=self.config.ANTHROPIC_API_KEY,
                 model=self.config.LLM_MODEL,
                 max_tokens=self.config.LLM_MAX_TOKENS,
-                temperature=self.config.LLM_TEMPERATURE
+                temperature=self.config.LLM_TEMPERATURE,
+                cache_ttl=self.config.LLM_CACHE_TTL
             )
             strategies.append(llm_strategy)
             logger.info("LLM strategy enabled")
@@ -103,8 +118,14 @@ class TradingBot:
             markets = self.client.get_markets_by_user(self.config.TARGET_USER)
             logger.info(f"Found {len(markets)} markets by {self.config.TARGET_USER}")
             
-            # Filter for open markets
-            open_markets = [m for m in markets if self.client.is_market_open(m)]
+            # Score traded markets that have resolved since the last cycle
+            self._record_resolutions(markets)
+            
+            # Filter for open markets once per cycle; everything below only sees these
+            now_ms = int(time.time() * 1000)
+            open_markets = {
+                m['id']: m for m in markets if self.client.is_market_open(m, now_ms)
+            }
             logger.info(f"{len(open_markets)} markets are open for trading")
             
             # Get current balance
@@ -114,17 +135,51 @@ class TradingBot:
                 return
             
             logger.info(f"Current balance: {balance:.0f}M")
+            self.risk_manager.update_balance(balance)
             
             # Check portfolio risk
             if self.risk_manager.should_limit_orders(balance):
                 logger.warning("Portfolio risk limits reached, skipping new trades")
                 return
             
-            # Analyze each market
+            # Don't spend requests on market data when no bet could fit the risk budget
+            if self.risk_manager.cheap_reject(balance):
+                logger.info("Risk budget can't fit a minimum bet, skipping data fetch")
+                return
+            if not open_markets:
+                logger.info("No open markets, skipping data fetch")
+                return
+            
+            # Fetch market data concurrently (the calls are I/O bound); history and
+            # comments are independent requests so they run as separate tasks
+            with ThreadPoolExecutor(max_workers=self.config.FETCH_WORKERS) as executor:
+                history_futures = [
+                    executor.submit(self.client.get_market_context, market_id)
+                    for market_id in open_markets
+                ]
+                comment_futures = [
+                    executor.submit(self.client.get_comments, market_id, limit=50)
+                    for market_id in open_markets
+                ]
+            contexts = [
+                self._build_context(history_future.result(), comment_future.result())
+                for history_future, comment_future in zip(history_futures, comment_futures)
+            ]
+            
+            # Analyze all markets in one batch; markets without enough edge come back as None.
+            # The individual strategy signals are kept for the trade records
+            signals, strategy_signals = self.ensemble.analyze_batch(
+                list(open_markets.values()),
+                contexts,
+                min_edge=self.config.MIN_EDGE,
+                return_grid=True
+            )
+            
+            # Trade on each signal
             trades_executed = 0
-            for market in open_markets:
+            for market, signal, market_signals in zip(open_markets.values(), signals, strategy_signals):
                 try:
-                    result = self._analyze_and_trade(market, balance)
+                    result = self._execute_signal(market, signal, balance, market_signals)
                     if result:
                         trades_executed += 1
                 except Exception as e:
@@ -138,27 +193,38 @@ class TradingBot:
         except Exception as e:
             logger.error(f"Error in trading cycle: {e}", exc_info=True)
     
-    def _analyze_and_trade(self, market: Dict, balance: float) -> bool:
-        """Analyze a market and potentially place a trade"""
+    def _build_context(
+        self,
+        market_context: Tuple[List[Dict], List[Dict]],
+        comments: List[Dict]
+    ) -> Dict[str, List[Dict]]:
+        """Bundle fetched market data as strategy kwargs"""
+        prob_history, bets = market_context
+        return {
+            'probability_history': prob_history,
+            'comments': comments,
+            'bets': bets
+        }
+    
+    def _execute_signal(
+        self,
+        market: Dict,
+        signal: Optional[StrategySignal],
+        balance: float,
+        strategy_signals: Optional[Dict[str, StrategySignal]] = None
+    ) -> bool:
+        """
+        Size and potentially place a trade for a market's ensemble signal
+        
+        strategy_signals, the individual signals behind the consensus, are saved
+        with the trade so its outcome can later be scored per strategy.
+        """
         
         market_id = market.get('id')
         question = market.get('question', '')
         
         logger.info(f"\nAnalyzing: {question[:80]}...")
         
-        # Get additional market data
-        prob_history = self.client.get_market_probability_history(market_id)
-        comments = self.client.get_comments(market_id, limit=50)
-        bets = self.client.get_bets(market_id, limit=100)
-        
-        # Get ensemble signal
-        signal = self.ensemble.analyze(
-            market,
-            probability_history=prob_history,
-            comments=comments,
-            bets=bets
-        )
-        
         if not signal:
             logger.debug("No signal generated - no strategy consensus")
             return False
@@ -167,7 +233,6 @@ class TradingBot:
             f"✓ Signal: {signal.direction} @ {signal.probability:.1%} "
             f"(confidence: {signal.confidence:.1%}, strength: {signal.strength:.2f})"
         )
-        logger.info(f"  Reasoning: {signal.reasoning[:100]}...")
         
         # Calculate bet size
         bet_size = self.risk_manager.calculate_bet_size(signal, market, balance)
@@ -177,6 +242,7 @@ class TradingBot:
             return False
         
         logger.info(f"✓ Bet size approved: {bet_size:.0f}M")
+        logger.info(f"  Reasoning: {signal.reasoning[:100]}...")
         
         # Execute trade
         if self.dry_run:
@@ -205,10 +271,13 @@ class TradingBot:
                         'confidence': signal.confidence,
                         'strength': signal.strength,
                         'reasoning': signal.reasoning
+                    },
+                    'strategy_probabilities': {
+                        name: s.probability for name, s in (strategy_signals or {}).items()
                     }
                 }
                 self.trades_history.append(trade_record)
-                self._save_trades_history()
+                self._append_trade(trade_record)
                 
                 # Update risk manager
                 self.risk_manager.add_position({
@@ -241,6 +310,46 @@ class TradingBot:
                 logger.error(f"Unexpected error: {e}", exc_info=True)
                 time.sleep(interval)
     
+    def _record_resolutions(self, markets: List[Dict]):
+        """
+        Feed trades on newly resolved markets to the ensemble's weight fitting
+        
+        Each scored trade is appended to the outcomes file and its position is
+        released from the risk manager.
+        """
+        resolutions = {
+            market['id']: market.get('resolution')
+            for market in markets
+            if market.get('isResolved')
+        }
+        if not resolutions:
+            return
+        
+        for trade in self.trades_history:
+            market_id = trade.get('market_id')
+            resolution = resolutions.get(market_id)
+            
+            # MKT and CANCEL resolutions have no YES/NO outcome to score against;
+            # trades recorded before per-strategy probabilities were saved can't be scored
+            if resolution not in ('YES', 'NO') or 'strategy_probabilities' not in trade:
+                continue
+            
+            key = (market_id, trade['timestamp'])
+            if key in self._recorded_outcomes:
+                continue
+            
+            record = {
+                'market_id': market_id,
+                'trade_timestamp': trade['timestamp'],
+                'strategy_probabilities': trade['strategy_probabilities'],
+                'outcome': resolution == 'YES'
+            }
+            self.ensemble.record_outcome(record['strategy_probabilities'], record['outcome'])
+            self._recorded_outcomes.add(key)
+            self._append_outcome(record)
+            self.risk_manager.remove_position(market_id)
+            logger.info(f"Recorded {resolution} resolution for market {market_id}")
+    
     def _update_performance_metrics(self):
         """Update and save performance metrics"""
         strategy_perf = self.ensemble.get_strategy_performance()
@@ -262,11 +371,11 @@ class TradingBot:
             if not os.path.exists(self.config.PERFORMANCE_FILE):
                 return {}
             
-            with open(self.config.PERFORMANCE_FILE, 'r') as f:
+            with open(self.config.PERFORMANCE_FILE, 'rb') as f:
                 content = f.read().strip()
                 if not content:
                     return {}
-                return json.loads(content)
+                return json_loads(content)
         except (FileNotFoundError, json.JSONDecodeError) as e:
             logger.warning(f"Could not load performance data: {e}. Starting fresh.")
             return {}
@@ -274,35 +383,74 @@ class TradingBot:
     def _save_performance_data(self):
         """Save performance data to disk"""
         try:
-            os.makedirs(os.path.dirname(self.config.PERFORMANCE_FILE), exist_ok=True)
-            with open(self.config.PERFORMANCE_FILE, 'w') as f:
-                json.dump(self.performance_data, f, indent=2)
+            with open(self.config.PERFORMANCE_FILE, 'wb') as f:
+                f.write(json_dumps(self.performance_data, indent=True))
         except Exception as e:
             logger.error(f"Error saving performance data: {e}")
     
     def _load_trades_history(self) -> List:
-        """Load trades history from disk"""
+        """Load trades history from disk (one JSON record per line)"""
         try:
             if not os.path.exists(self.config.TRADES_FILE):
-                return []
+                return self._migrate_legacy_trades()
             
-            with open(self.config.TRADES_FILE, 'r') as f:
-                content = f.read().strip()
-                if not content:
-                    return []
-                return json.loads(content)
+            with open(self.config.TRADES_FILE, 'rb') as f:
+                return [json_loads(line) for line in f if line.strip()]
         except (FileNotFoundError, json.JSONDecodeError) as e:
             logger.warning(f"Could not load trades history: {e}. Starting fresh.")
             return []
     
-    def _save_trades_history(self):
-        """Save trades history to disk"""
+    def _migrate_legacy_trades(self) -> List:
+        """
+        Convert a trades.json list left by older versions into the JSONL file
+        
+        Runs once: afterwards the JSONL file exists and is read instead. The old
+        file is left in place.
+        """
+        legacy_file = os.path.splitext(self.config.TRADES_FILE)[0] + '.json'
+        if not os.path.exists(legacy_file):
+            return []
+        
+        try:
+            with open(legacy_file, 'rb') as f:
+                content = f.read().strip()
+            trades = json_loads(content) if content else []
+        except json.JSONDecodeError as e:
+            logger.warning(f"Could not migrate {legacy_file}: {e}. Starting fresh.")
+            return []
+        
+        with open(self.config.TRADES_FILE, 'wb') as f:
+            f.write(b''.join(json_dumps(trade) + b'\n' for trade in trades))
+        logger.info(f"Migrated {len(trades)} trades from {legacy_file} to {self.config.TRADES_FILE}")
+        return trades
+    
+    def _append_trade(self, trade_record: Dict):
+        """Append a single trade record to the history file"""
+        try:
+            with open(self.config.TRADES_FILE, 'ab') as f:
+                f.write(json_dumps(trade_record) + b'\n')
+        except Exception as e:
+            logger.error(f"Error saving trade: {e}")
+    
+    def _load_outcomes(self) -> List:
+        """Load scored trade outcomes from disk (one JSON record per line)"""
+        try:
+            if not os.path.exists(self.config.OUTCOMES_FILE):
+                return []
+            
+            with open(self.config.OUTCOMES_FILE, 'rb') as f:
+                return [json_loads(line) for line in f if line.strip()]
+        except (FileNotFoundError, json.JSONDecodeError) as e:
+            logger.warning(f"Could not load trade outcomes: {e}. Starting fresh.")
+            return []
+    
+    def _append_outcome(self, record: Dict):
+        """Append a single scored trade outcome to the outcomes file"""
         try:
-            os.makedirs(os.path.dirname(self.config.TRADES_FILE), exist_ok=True)
-            with open(self.config.TRADES_FILE, 'w') as f:
-                json.dump(self.trades_history, f, indent=2)
+            with open(self.config.OUTCOMES_FILE, 'ab') as f:
+                f.write(json_dumps(record) + b'\n')
         except Exception as e:
-            logger.error(f"Error saving trades history: {e}")
+            logger.error(f"Error saving trade outcome: {e}")
 
 
 def main():
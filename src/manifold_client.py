@@ -3,58 +3,137 @@ Manifold Markets API Client
 Provides a clean interface to the Manifold Markets API
 """
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import threading
 import time
-from typing import List, Dict, Optional, Any
+from operator import itemgetter
+from typing import List, Dict, Optional, Any, Tuple
 from datetime import datetime
 import logging
 
+from utils.serialization import json_loads
+
 logger = logging.getLogger(__name__)
 
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def _build_session() -> requests.Session:
+    """Create a pooled session that retries rate limits and server errors with backoff"""
+    session = requests.Session()
+    
+    # Keep enough pooled connections for concurrent fetches so keep-alive
+    # connections are reused rather than discarded and re-handshaked
+    adapter = HTTPAdapter(
+        pool_connections=32,
+        pool_maxsize=64,
+        max_retries=Retry(
+            total=3,
+            backoff_factor=1,
+            status_forcelist=[429, 500, 502, 503, 504],
+            raise_on_status=False
+        )
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def _get_session() -> requests.Session:
+    """Return the process-wide session, building it on first use"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
 
 class ManifoldClient:
     """Client for interacting with Manifold Markets API"""
     
-    def __init__(self, api_key: str, base_url: str = 'https://api.manifold.markets'):
+    # Number of most recent bets kept as probability history per market
+    HISTORY_LIMIT = 1000
+    
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = 'https://api.manifold.markets',
+        user_cache_ttl: float = 300
+    ):
         self.api_key = api_key
         self.base_url = base_url
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.user_cache_ttl = user_cache_ttl
+        self._user_cache: Dict[str, Tuple[float, Dict]] = {}
+        self._hist_cache: Dict[str, List[Dict]] = {}
+        self._hist_last_ts: Dict[str, int] = {}
+        self._etags: Dict[str, str] = {}
+        self._body_cache: Dict[str, Any] = {}
+        
+        # The session is shared across clients, so auth is sent per request
+        self.session = _get_session()
+        self.headers = {
             'Authorization': f'Key {api_key}',
             'Content-Type': 'application/json'
-        })
+        }
     
-    def _request(self, method: str, endpoint: str, **kwargs) -> Any:
-        """Make API request with error handling and retries"""
+    def _request(self, method: str, endpoint: str, cache_key: Optional[str] = None, **kwargs) -> Any:
+        """
+        Make API request with error handling (retries are handled by the session adapter)
+        
+        When cache_key is given the response ETag is remembered and sent back as
+        If-None-Match, so an unchanged resource comes back as a bodyless 304 and
+        the previously parsed body is returned.
+        """
         url = f"{self.base_url}{endpoint}"
-        max_retries = 3
-        retry_delay = 1
+        headers = self.headers
+        if cache_key is not None and cache_key in self._etags:
+            headers = {**headers, 'If-None-Match': self._etags[cache_key]}
+        
+        try:
+            response = self.session.request(method, url, headers=headers, **kwargs)
+            if response.status_code == 304 and cache_key in self._body_cache:
+                return self._body_cache[cache_key]
+            response.raise_for_status()
+            body = json_loads(response.content) if response.content else None
+        except requests.exceptions.HTTPError as e:
+            logger.error(f"HTTP error: {e}")
+            raise
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Request failed: {e}")
+            raise
         
-        for attempt in range(max_retries):
-            try:
-                response = self.session.request(method, url, **kwargs)
-                response.raise_for_status()
-                return response.json() if response.content else None
-            except requests.exceptions.HTTPError as e:
-                if e.response.status_code == 429:  # Rate limit
-                    wait_time = retry_delay * (2 ** attempt)
-                    logger.warning(f"Rate limited, waiting {wait_time}s")
-                    time.sleep(wait_time)
-                    continue
-                logger.error(f"HTTP error: {e}")
-                raise
-            except requests.exceptions.RequestException as e:
-                if attempt == max_retries - 1:
-                    logger.error(f"Request failed after {max_retries} attempts: {e}")
-                    raise
-                time.sleep(retry_delay)
+        if cache_key is not None:
+            etag = response.headers.get('ETag')
+            if etag:
+                self._etags[cache_key] = etag
+                self._body_cache[cache_key] = body
         
-        return None
+        return body
+    
+    def _get_user(self, username: str, refresh: bool = False) -> Optional[Dict]:
+        """Get a user, serving repeated lookups from a short-lived cache"""
+        now = time.monotonic()
+        cached = self._user_cache.get(username)
+        if cached and not refresh and now - cached[0] < self.user_cache_ttl:
+            return cached[1]
+        
+        user = self._request('GET', f'/v0/user/{username}')
+        if user:
+            self._user_cache[username] = (now, user)
+        return user
+    
+    def clear_user_cache(self):
+        """Drop all cached user lookups"""
+        self._user_cache.clear()
     
     def get_markets_by_user(self, username: str, limit: int = 100) -> List[Dict]:
         """Get all markets created by a specific user"""
         try:
-            # Get user ID first
-            user = self._request('GET', f'/v0/user/{username}')
+            # Get user ID first (static, so a cached lookup is fine)
+            user = self._get_user(username)
             if not user:
                 logger.error(f"User {username} not found")
                 return []
@@ -68,7 +147,9 @@ class ManifoldClient:
                 'sort': 'created-time',
                 'order': 'desc'
             }
-            markets = self._request('GET', '/v0/markets', params=params)
+            markets = self._request(
+                'GET', '/v0/markets', cache_key=f'markets:{user_id}:{limit}', params=params
+            )
             return markets or []
         except Exception as e:
             logger.error(f"Error fetching markets for {username}: {e}")
@@ -82,14 +163,22 @@ class ManifoldClient:
             logger.error(f"Error fetching market {market_id}: {e}")
             return None
     
-    def get_bets(self, market_id: str, limit: int = 100) -> List[Dict]:
-        """Get bets for a specific market"""
+    def get_bets(
+        self,
+        market_id: str,
+        limit: int = 100,
+        after_time: Optional[int] = None
+    ) -> List[Dict]:
+        """Get bets for a specific market, optionally only those after a timestamp (ms)"""
         try:
             params = {
                 'contractId': market_id,
                 'limit': limit,
                 'order': 'desc'
             }
+            if after_time is not None:
+                params['afterTime'] = after_time
+            
             bets = self._request('GET', '/v0/bets', params=params)
             return bets or []
         except Exception as e:
@@ -145,7 +234,8 @@ class ManifoldClient:
     def get_user_balance(self, username: str) -> Optional[float]:
         """Get user's current mana balance"""
         try:
-            user = self._request('GET', f'/v0/user/{username}')
+            # Balance changes with every bet, so always refresh it
+            user = self._get_user(username, refresh=True)
             if user:
                 return user.get('balance', 0)
             return None
@@ -158,7 +248,7 @@ class ManifoldClient:
         try:
             # This would need to be implemented by fetching user's bets
             # and calculating current positions
-            user = self._request('GET', f'/v0/user/{username}')
+            user = self._get_user(username)
             if not user:
                 return []
             
@@ -170,34 +260,83 @@ class ManifoldClient:
             return []
     
     def get_market_probability_history(self, market_id: str) -> List[Dict]:
-        """Get historical probability data for a market"""
+        """
+        Get historical probability data for a market
+        
+        Bets are append-only, so history is cached per market and later calls
+        only fetch bets placed after the last one already seen.
+        """
         try:
+            cached = self._hist_cache.get(market_id, [])
+            last_ts = self._hist_last_ts.get(market_id)
+            
             # Get bets which contain probability updates
-            bets = self.get_bets(market_id, limit=1000)
+            bets = self.get_bets(market_id, limit=self.HISTORY_LIMIT, after_time=last_ts)
             
-            history = []
-            for bet in bets:
-                if 'probAfter' in bet:
-                    history.append({
-                        'timestamp': bet.get('createdTime'),
-                        'probability': bet.get('probAfter'),
-                        'amount': bet.get('amount'),
-                        'outcome': bet.get('outcome')
-                    })
+            # The API returns newest bets first, so walking them in reverse yields
+            # points already in time order and the sort below is a linear pass
+            new_points = [
+                {
+                    'timestamp': bet.get('createdTime'),
+                    'probability': bet['probAfter'],
+                    'amount': bet.get('amount'),
+                    'outcome': bet.get('outcome')
+                }
+                for bet in reversed(bets)
+                if 'probAfter' in bet
+            ]
             
-            return sorted(history, key=lambda x: x['timestamp'])
+            if not new_points:
+                return cached
+            
+            new_points.sort(key=itemgetter('timestamp'))
+            
+            # A full page means we may have missed bets in between, so start over
+            if len(bets) >= self.HISTORY_LIMIT:
+                cached = []
+            
+            history = (cached + new_points)[-self.HISTORY_LIMIT:]
+            self._hist_cache[market_id] = history
+            self._hist_last_ts[market_id] = history[-1]['timestamp']
+            return history
         except Exception as e:
             logger.error(f"Error fetching probability history: {e}")
             return []
     
-    def is_market_open(self, market: Dict) -> bool:
-        """Check if a market is still open for trading"""
+    def get_market_context(
+        self,
+        market_id: str,
+        bet_limit: int = 100
+    ) -> Tuple[List[Dict], List[Dict]]:
+        """
+        Get probability history and recent bets for a market with one bets request
+        
+        History points carry each bet's amount and outcome, so the recent bets are
+        taken from the synced history instead of fetching the bets endpoint again.
+        
+        Returns:
+            (probability history oldest first, up to bet_limit bets newest first)
+        """
+        history = self.get_market_probability_history(market_id)
+        return history, history[-bet_limit:][::-1]
+    
+    def is_market_open(self, market: Dict, now_ms: Optional[int] = None) -> bool:
+        """
+        Check if a market is still open for trading
+        
+        Args:
+            market: Market data
+            now_ms: Current time in epoch milliseconds; pass it when checking many
+                markets so the clock is read once
+        """
         if market.get('isResolved'):
             return False
         
         close_time = market.get('closeTime')
         if close_time:
-            return close_time > int(time.time() * 1000)
+            if now_ms is None:
+                now_ms = int(time.time() * 1000)
+            return close_time > now_ms
         
         return True
     
@@ -3,21 +3,70 @@ Risk Management Module
 Handles position sizing and portfolio risk
 """
 import logging
-from typing import Dict, Any, Optional
-import sys
-from pathlib import Path
-
-# Add parent directory to path for imports
-sys.path.insert(0, str(Path(__file__).parent))
+from typing import Dict, Any, Optional, List
+import numpy as np
 
 from strategies.base_strategy import StrategySignal
 
 logger = logging.getLogger(__name__)
 
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+
+def _bet_sizes_loop(
+    est: np.ndarray,
+    mkt: np.ndarray,
+    yes: np.ndarray,
+    confidence: np.ndarray,
+    balance: float,
+    kelly_fraction: float,
+    min_bet: float,
+    max_bet: float
+) -> np.ndarray:
+    """
+    Scalar-loop version of the Kelly sizing in RiskManager.calculate_bet_size for Numba
+    
+    Returns:
+        Bet size per signal before the portfolio risk check, -1 where there is no bet
+    """
+    n = est.shape[0]
+    out = np.empty(n, dtype=np.float64)
+    for i in range(n):
+        if yes[i]:
+            edge = est[i] - mkt[i]
+            m = mkt[i]
+        else:
+            edge = mkt[i] - est[i]
+            m = 1 - mkt[i]
+        if edge < 0.05 or m >= 0.999:
+            out[i] = -1.0
+        else:
+            bet = edge / (1 - m) * kelly_fraction * balance * confidence[i]
+            out[i] = max(min_bet, min(max_bet, bet))
+    return out
+
+
+if HAS_NUMBA:
+    # No fastmath: the edge gates must match calculate_bet_size exactly
+    _bet_sizes_kernel = njit(cache=True)(_bet_sizes_loop)
+    # Compile on import rather than on the first scan
+    _bet_sizes_kernel(
+        np.zeros(1), np.zeros(1), np.zeros(1, dtype=np.bool_), np.zeros(1), 1.0, 1.0, 1.0, 1.0
+    )
+
 
 class RiskManager:
     """Manages trading risk and position sizing"""
     
+    __slots__ = (
+        'max_bet_amount', 'min_bet_amount', 'kelly_fraction', 'max_portfolio_risk',
+        'risk_tolerance', 'open_positions', '_current_risk', '_balance', '_max_risk_mana'
+    )
+    
     def __init__(
         self,
         max_bet_amount: float = 100,
@@ -31,7 +80,20 @@ class RiskManager:
         self.kelly_fraction = kelly_fraction
         self.max_portfolio_risk = max_portfolio_risk
         self.risk_tolerance = risk_tolerance
-        self.open_positions = []
+        self.open_positions: Dict[str, Dict[str, Any]] = {}  # Keyed by market_id
+        self._current_risk = 0.0
+        self._balance: Optional[float] = None
+        self._max_risk_mana = 0.0
+    
+    def update_balance(self, balance: float) -> None:
+        """
+        Cache the portfolio risk budget for a balance
+        
+        Called once per scan; the sizing methods only recompute the budget
+        when they are handed a different balance.
+        """
+        self._balance = balance
+        self._max_risk_mana = self.max_portfolio_risk * balance
     
     def calculate_bet_size(
         self,
@@ -51,34 +113,29 @@ class RiskManager:
             Bet size in mana, or None if shouldn't bet
         """
         
+        if balance != self._balance:
+            self.update_balance(balance)
+        
         market_prob = market.get('probability', 0.5)
         estimated_prob = signal.probability
         
-        # Calculate edge
-        if signal.direction == 'YES':
-            edge = estimated_prob - market_prob
-            win_prob = estimated_prob
-            lose_prob = 1 - estimated_prob
-            win_odds = (1 - market_prob) / market_prob  # Payout ratio
-        else:
-            edge = market_prob - estimated_prob
-            win_prob = 1 - estimated_prob
-            lose_prob = estimated_prob
-            win_odds = market_prob / (1 - market_prob)
-        
-        # Require minimum edge
+        # Require minimum edge (checked first: most candidates stop here)
+        yes = signal.direction == 'YES'
+        edge = estimated_prob - market_prob if yes else market_prob - estimated_prob
         if edge < 0.05:
             logger.debug(f"Edge too small: {edge:.2%}")
             return None
         
-        # Kelly Criterion: f = (p * odds - q) / odds
-        # where p = win probability, q = lose probability, odds = win_odds
-        kelly_fraction_full = (win_prob * win_odds - lose_prob) / win_odds
-        
-        if kelly_fraction_full <= 0:
-            logger.debug(f"Kelly fraction negative: {kelly_fraction_full:.2%}")
+        # Price of the side being bought; nothing left to win at (or next to) certainty
+        m = market_prob if yes else 1 - market_prob
+        if m >= 0.999:
+            logger.debug(f"Market price too close to 1: {m:.3f}")
             return None
         
+        # Kelly Criterion: f = (p * odds - q) / odds with odds = (1 - m) / m
+        # simplifies to (p - m) / (1 - m), positive whenever there is edge
+        kelly_fraction_full = edge / (1 - m)
+        
         # Apply fractional Kelly for risk management
         kelly_bet = kelly_fraction_full * self.kelly_fraction * balance
         
@@ -92,7 +149,7 @@ class RiskManager:
         if not self._check_portfolio_risk(bet_size, balance):
             logger.warning(f"Bet size {bet_size} exceeds portfolio risk limits")
             # Reduce bet size to fit within limits
-            max_additional_risk = self.max_portfolio_risk * balance - self._get_current_risk()
+            max_additional_risk = self._max_risk_mana - self._get_current_risk()
             bet_size = min(bet_size, max_additional_risk)
         
         # Final validation
@@ -108,30 +165,168 @@ class RiskManager:
         
         return round(bet_size, 2)
     
+    def calculate_bet_sizes_batch(
+        self,
+        signals: List[StrategySignal],
+        markets: List[Dict[str, Any]],
+        balance: float
+    ) -> List[Optional[float]]:
+        """
+        Calculate calculate_bet_size for many signals in one pass
+        
+        Each bet is sized independently against the current portfolio risk,
+        exactly as separate calculate_bet_size calls would size it.
+        
+        Args:
+            signals: Trading signals
+            markets: Market data, aligned with signals
+            balance: Current account balance
+        
+        Returns:
+            Bet size in mana (or None if shouldn't bet) for each signal
+        """
+        
+        if balance != self._balance:
+            self.update_balance(balance)
+        
+        n = len(signals)
+        est = np.fromiter((signal.probability for signal in signals), dtype=np.float64, count=n)
+        mkt = np.fromiter((market.get('probability', 0.5) for market in markets), dtype=np.float64, count=n)
+        yes = np.fromiter((signal.direction == 'YES' for signal in signals), dtype=np.bool_, count=n)
+        confidence = np.fromiter((signal.confidence for signal in signals), dtype=np.float64, count=n)
+        
+        if HAS_NUMBA:
+            bets = _bet_sizes_kernel(
+                est, mkt, yes, confidence, float(balance), float(self.kelly_fraction),
+                float(self.min_bet_amount), float(self.max_bet_amount)
+            )
+        else:
+            edge = np.where(yes, est - mkt, mkt - est)
+            m = np.where(yes, mkt, 1 - mkt)
+            tradable = (edge >= 0.05) & (m < 0.999)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                kelly = edge / (1 - m) * self.kelly_fraction * balance * confidence
+            bets = np.where(
+                tradable, np.clip(kelly, self.min_bet_amount, self.max_bet_amount), -1.0
+            )
+        
+        # Reduce bets to the remaining portfolio risk budget
+        headroom = self._max_risk_mana - self._get_current_risk()
+        bets = np.where(bets > headroom, headroom, bets)
+        
+        min_bet = self.min_bet_amount
+        return [round(bet, 2) if bet >= min_bet else None for bet in bets.tolist()]
+    
+    def calculate_portfolio_bet_sizes(
+        self,
+        signals: List[StrategySignal],
+        markets: List[Dict[str, Any]],
+        balance: float
+    ) -> Dict[str, float]:
+        """
+        Size bets across several markets at once with the quadratic Kelly approximation
+        
+        Maximizing E[r.f] - 1/2 f.Sigma.f instead of E[log(1 + r.f)] turns sizing into
+        one linear solve, f = Sigma^-1 mu, where mu is the expected return per mana
+        staked and Sigma its covariance. Markets are treated as independent, with each
+        variance inflated by the signal's lack of confidence.
+        
+        Args:
+            signals: Trading signals, one per market
+            markets: Market data, aligned with signals
+            balance: Current account balance
+        
+        Returns:
+            Bet size in mana by market id, for markets worth betting on
+        """
+        
+        if balance != self._balance:
+            self.update_balance(balance)
+        
+        est = np.array([signal.probability for signal in signals], dtype=np.float64)
+        mkt = np.array([market.get('probability', 0.5) for market in markets], dtype=np.float64)
+        yes = np.array([signal.direction == 'YES' for signal in signals])
+        confidence = np.array([signal.confidence for signal in signals], dtype=np.float64)
+        
+        # Work in the probability space of the side being bought
+        p = np.where(yes, est, 1 - est)
+        m = np.where(yes, mkt, 1 - mkt)
+        
+        # Same edge and pricing gates as calculate_bet_size
+        tradable = (p - m >= 0.05) & (m < 0.999) & (m > 0) & (p < 1) & (confidence > 0)
+        if not tradable.any():
+            return {}
+        p, m, confidence = p[tradable], m[tradable], confidence[tradable]
+        ids = [market.get('id') for market, ok in zip(markets, tradable) if ok]
+        
+        # A mana staked at price m returns 1/m - 1 with probability p, else -1
+        mu = p / m - 1
+        sigma = np.diag(p * (1 - p) / (m * m) / confidence)
+        
+        fractions = np.linalg.solve(sigma, mu) * self.kelly_fraction
+        bets = np.clip(fractions * balance, self.min_bet_amount, self.max_bet_amount)
+        
+        # Scale down to the remaining portfolio risk budget
+        headroom = self._max_risk_mana - self._get_current_risk()
+        total = bets.sum()
+        if total > headroom:
+            bets *= max(headroom, 0.0) / total
+        
+        return {
+            market_id: round(float(bet), 2)
+            for market_id, bet in zip(ids, bets)
+            if bet >= self.min_bet_amount
+        }
+    
+    def cheap_reject(self, balance: float) -> bool:
+        """
+        Check whether the cycle can stop before fetching any market data
+        
+        Args:
+            balance: Current account balance
+        
+        Returns:
+            True if no bet on any market could pass the risk limits
+        """
+        # Every bet is at least min_bet_amount, so with less headroom than that
+        # calculate_bet_size would decline whatever the signal
+        if balance != self._balance:
+            self.update_balance(balance)
+        headroom = self._max_risk_mana - self._get_current_risk()
+        return headroom < self.min_bet_amount
+    
     def _check_portfolio_risk(self, new_bet: float, balance: float) -> bool:
         """Check if new bet would exceed portfolio risk limits"""
         
-        current_risk = self._get_current_risk()
-        total_risk = current_risk + new_bet
+        if balance != self._balance:
+            self.update_balance(balance)
         
-        max_risk = self.max_portfolio_risk * balance
-        
-        return total_risk <= max_risk
+        return self._get_current_risk() + new_bet <= self._max_risk_mana
     
     def _get_current_risk(self) -> float:
         """Calculate current portfolio risk"""
-        return sum(pos.get('amount', 0) for pos in self.open_positions)
+        return self._current_risk
     
     def add_position(self, position: Dict[str, Any]):
-        """Record a new open position"""
-        self.open_positions.append(position)
+        """Record a new open position, adding to any existing one on the same market"""
+        if 'amount' not in position:
+            raise ValueError("Position is missing 'amount'")
+        
+        market_id = position.get('market_id')
+        amount = position['amount']
+        
+        existing = self.open_positions.get(market_id)
+        if existing:
+            position = {**position, 'amount': existing['amount'] + amount}
+        
+        self.open_positions[market_id] = position
+        self._current_risk += amount
     
     def remove_position(self, market_id: str):
         """Remove a closed position"""
-        self.open_positions = [
-            pos for pos in self.open_positions
-            if pos.get('market_id') != market_id
-        ]
+        position = self.open_positions.pop(market_id, None)
+        if position:
+            self._current_risk -= position['amount']
     
     def get_portfolio_metrics(self, balance: float) -> Dict[str, float]:
         """Calculate portfolio risk metrics"""
@@ -150,14 +345,16 @@ class RiskManager:
     def should_limit_orders(self, balance: float) -> bool:
         """Check if we should limit new orders due to risk"""
         
-        metrics = self.get_portfolio_metrics(balance)
+        if balance != self._balance:
+            self.update_balance(balance)
         
         # Limit orders if we're using too much capital
-        if metrics['exposure_ratio'] > self.max_portfolio_risk:
+        # (exposure / balance > max_portfolio_risk, without building the metrics)
+        if balance > 0 and self._get_current_risk() > self._max_risk_mana:
             return True
         
         # Limit orders if we have too many positions
-        if metrics['num_positions'] >= 20:  # Max positions
+        if len(self.open_positions) >= 20:  # Max positions
             return True
         
         return False
\ No newline at end of file
@@ -3,31 +3,73 @@ Base Strategy Class
 All trading strategies inherit from this
 """
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
-from dataclasses import dataclass
+from typing import Dict, Any, Optional, Callable, Union
+from dataclasses import dataclass, fields
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(frozen=True, init=False)
 class StrategySignal:
-    """Signal generated by a trading strategy"""
+    """
+    Signal generated by a trading strategy
+    
+    reasoning may be given as a zero-argument callable; it is then formatted on
+    first access, so signals that are never logged or recorded skip the work.
+    
+    weighted_probability (probability weighted by confidence) is computed once
+    at construction; signals are frozen, so it can't go stale.
+    """
+    # Explicit slots (dataclass(slots=True) needs Python 3.10) keep signals small
+    __slots__ = (
+        'probability', 'confidence', 'direction', '_reasoning', 'strength', 'weighted_probability'
+    )
+    
     probability: float  # Estimated probability (0-1)
     confidence: float  # Confidence in the estimate (0-1)
     direction: str  # 'YES' or 'NO'
-    reasoning: str  # Explanation of the signal
+    reasoning: str  # Explanation of the signal (property below, stored in _reasoning)
     strength: float  # Signal strength (0-1)
     
+    def __init__(
+        self,
+        probability: float,
+        confidence: float,
+        direction: str,
+        reasoning: Union[str, Callable[[], str]],
+        strength: float
+    ):
+        object.__setattr__(self, 'probability', probability)
+        object.__setattr__(self, 'confidence', confidence)
+        object.__setattr__(self, 'direction', direction)
+        object.__setattr__(self, '_reasoning', reasoning)
+        object.__setattr__(self, 'strength', strength)
+        object.__setattr__(self, 'weighted_probability', probability * confidence)
+    
     @property
-    def weighted_probability(self) -> float:
-        """Probability weighted by confidence"""
-        return self.probability * self.confidence
+    def reasoning(self) -> str:
+        """Explanation of the signal, formatted on first access if deferred"""
+        reasoning = self._reasoning
+        if callable(reasoning):
+            reasoning = reasoning()
+            object.__setattr__(self, '_reasoning', reasoning)
+        return reasoning
+    
+    # Frozen slotted instances can't be restored through setattr, so pickling
+    # and copying go through these (reasoning is formatted so no callable is pickled)
+    def __getstate__(self):
+        return tuple(getattr(self, f.name) for f in fields(self))
+    
+    def __setstate__(self, state):
+        self.__init__(*state)
 
 
 class BaseStrategy(ABC):
     """Abstract base class for trading strategies"""
     
+    __slots__ = ('name', 'config', 'performance_history', 'enabled')
+    
     def __init__(self, name: str, config: Dict[str, Any] = None, **kwargs):
         self.name = name
         self.config = config or kwargs  # Accept either config dict or kwargs
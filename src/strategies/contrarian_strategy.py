@@ -4,13 +4,8 @@ Bets against extreme probabilities, looking for mean reversion
 """
 from typing import Dict, Any, Optional, List
 import logging
-import sys
-from pathlib import Path
 
-# Add parent directory to path for imports
-sys.path.insert(0, str(Path(__file__).parent.parent))
-
-from strategies.base_strategy import BaseStrategy, StrategySignal
+from .base_strategy import BaseStrategy, StrategySignal
 
 logger = logging.getLogger(__name__)
 
@@ -18,11 +13,15 @@ logger = logging.getLogger(__name__)
 class ContrarianStrategy(BaseStrategy):
     """Strategy that fades extreme probabilities"""
     
+    __slots__ = ('extreme_threshold_high', 'extreme_threshold_low', 'reversion_target', 'min_strength')
+    
     def __init__(self, **kwargs):
         # Extract contrarian-specific config
         self.extreme_threshold_high = kwargs.pop('extreme_threshold_high', 0.85)
         self.extreme_threshold_low = kwargs.pop('extreme_threshold_low', 0.15)
         self.reversion_target = kwargs.pop('reversion_target', 0.5)
+        # Skip signals whose strength could not reach this even at maximum confidence
+        self.min_strength = kwargs.pop('min_strength', 0.0)
         
         # Initialize parent
         super().__init__(name='Contrarian', **kwargs)
@@ -38,50 +37,42 @@ class ContrarianStrategy(BaseStrategy):
         if num_traders < 3:
             return None
         
-        # Check for extreme high probability
+        # A thinly traded market with no volume gives no crowd to fade
+        if volume == 0 and num_traders < 5:
+            return None
+        
+        # Fade whichever extreme the market sits at
         if current_prob >= self.extreme_threshold_high:
-            # Bet NO (against the crowd)
-            estimated_prob = self._calculate_reversion_target(current_prob, 'high')
-            confidence = self._calculate_confidence(current_prob, volume, num_traders, 'high')
-            strength = (current_prob - self.extreme_threshold_high) * confidence
-            
-            reasoning = (
-                f"Market at extreme high probability ({current_prob:.1%}). "
-                f"Expect mean reversion. {num_traders} traders may be overconfident. "
-                f"Historical patterns suggest reversion toward {estimated_prob:.1%}."
-            )
-            
-            return StrategySignal(
-                probability=estimated_prob,
-                confidence=confidence,
-                direction='NO',
-                reasoning=reasoning,
-                strength=min(1.0, strength)
-            )
-        
-        # Check for extreme low probability
+            extreme_type, direction, crowd = 'high', 'NO', 'overconfident'
+            gap = current_prob - self.extreme_threshold_high
         elif current_prob <= self.extreme_threshold_low:
-            # Bet YES (against the crowd)
-            estimated_prob = self._calculate_reversion_target(current_prob, 'low')
-            confidence = self._calculate_confidence(current_prob, volume, num_traders, 'low')
-            strength = (self.extreme_threshold_low - current_prob) * confidence
-            
-            reasoning = (
-                f"Market at extreme low probability ({current_prob:.1%}). "
-                f"Expect mean reversion. {num_traders} traders may be overly pessimistic. "
+            extreme_type, direction, crowd = 'low', 'YES', 'overly pessimistic'
+            gap = self.extreme_threshold_low - current_prob
+        else:
+            # Not extreme enough
+            return None
+        
+        # Strength is the gap scaled by confidence, which is at most 0.8
+        if gap * 0.8 < self.min_strength:
+            return None
+        
+        # Bet against the crowd
+        estimated_prob = self._calculate_reversion_target(current_prob, extreme_type)
+        confidence = self._calculate_confidence(current_prob, volume, num_traders, extreme_type)
+        strength = gap * confidence
+        
+        return StrategySignal(
+            probability=estimated_prob,
+            confidence=confidence,
+            direction=direction,
+            # Formatted only if the reasoning is read, i.e. the signal is traded
+            reasoning=lambda: (
+                f"Market at extreme {extreme_type} probability ({current_prob:.1%}). "
+                f"Expect mean reversion. {num_traders} traders may be {crowd}. "
                 f"Historical patterns suggest reversion toward {estimated_prob:.1%}."
-            )
-            
-            return StrategySignal(
-                probability=estimated_prob,
-                confidence=confidence,
-                direction='YES',
-                reasoning=reasoning,
-                strength=min(1.0, strength)
-            )
-        
-        # Not extreme enough
-        return None
+            ),
+            strength=min(1.0, strength)
+        )
     
     def _calculate_reversion_target(self, current_prob: float, extreme_type: str) -> float:
         """Calculate expected reversion target"""
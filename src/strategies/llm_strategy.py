@@ -2,46 +2,87 @@
 LLM-Powered Trading Strategy
 Uses Claude to analyze market questions and estimate probabilities
 """
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple, List, TYPE_CHECKING
+from collections import OrderedDict
+import asyncio
+import hashlib
 import logging
-import sys
-from pathlib import Path
+import re
+import time
 
-# Add parent directory to path for imports
-sys.path.insert(0, str(Path(__file__).parent.parent))
+from .base_strategy import BaseStrategy, StrategySignal
 
-from strategies.base_strategy import BaseStrategy, StrategySignal
+if TYPE_CHECKING:
+    # For annotations only; the SDK itself is imported when first needed
+    from anthropic import AsyncAnthropic
 
 logger = logging.getLogger(__name__)
 
-try:
-    from anthropic import Anthropic
-    HAS_ANTHROPIC = True
-except ImportError:
-    HAS_ANTHROPIC = False
-    logger.warning("Anthropic package not installed. LLM strategy will be disabled.")
+# One "KEY: value" field of the response; a value runs until the next field or the end
+_RESPONSE_RE = re.compile(
+    r'^[ \t]*(?P<key>PROBABILITY|CONFIDENCE|DIRECTION|REASONING|STRENGTH):[ \t]*'
+    r'(?P<val>.*?)'
+    r'(?=\n[ \t]*(?:PROBABILITY|CONFIDENCE|DIRECTION|REASONING|STRENGTH):|\Z)',
+    re.M | re.S
+)
+
+
+def _first_line(value: str) -> str:
+    # Single-line fields; ignore anything the model added after them
+    return value.strip().split('\n', 1)[0].strip()
+
+
+# How each captured field value is turned into a StrategySignal argument
+_FIELD_CASTS = {
+    'probability': lambda v: float(_first_line(v)),
+    'confidence': lambda v: float(_first_line(v)),
+    'direction': lambda v: _first_line(v).upper(),
+    # Reasoning may span multiple lines
+    'reasoning': lambda v: ' '.join(line.strip() for line in v.splitlines() if line.strip()),
+    'strength': lambda v: float(_first_line(v)),
+}
 
 
 class LLMStrategy(BaseStrategy):
     """Strategy that uses Claude to analyze markets"""
     
+    __slots__ = (
+        'model', 'max_tokens', 'temperature', 'cache_ttl', 'cache_size',
+        'max_concurrency', 'api_key', 'client', '_cache'
+    )
+    
     def __init__(self, api_key: str = None, model: str = 'claude-sonnet-4-20250514', **kwargs):
         # Extract config before passing to parent
         self.model = model
         self.max_tokens = kwargs.pop('max_tokens', 1000)
         self.temperature = kwargs.pop('temperature', 0.7)
+        self.cache_ttl = kwargs.pop('cache_ttl', 3600)
+        self.cache_size = kwargs.pop('cache_size', 2048)
+        self.max_concurrency = kwargs.pop('max_concurrency', 8)  # Parallel requests in analyze_many
+        self.api_key = api_key
+        
+        # (question hash, probability bucket) -> (time cached, signal)
+        self._cache: 'OrderedDict[Tuple[str, int], Tuple[float, Optional[StrategySignal]]]' = OrderedDict()
         
         # Initialize parent class
         super().__init__(name='LLM Analyst', **kwargs)
         
-        if HAS_ANTHROPIC and api_key:
-            self.client = Anthropic(api_key=api_key)
-            self.enabled = True
-        else:
-            self.client = None
-            self.enabled = False
-            if not api_key:
-                logger.warning("No Anthropic API key provided. LLM strategy disabled.")
+        self.client = None
+        self.enabled = False
+        
+        if not api_key:
+            logger.warning("No Anthropic API key provided. LLM strategy disabled.")
+            return
+        
+        # Imported here so runs without an API key don't pay for loading the SDK
+        try:
+            from anthropic import Anthropic
+        except ImportError:
+            logger.warning("Anthropic package not installed. LLM strategy will be disabled.")
+            return
+        
+        self.client = Anthropic(api_key=api_key)
+        self.enabled = True
     
     def analyze(self, market: Dict[str, Any], **kwargs) -> Optional[StrategySignal]:
         """Use Claude to analyze the market question"""
@@ -50,45 +91,148 @@ class LLMStrategy(BaseStrategy):
             return None
         
         try:
-            # Prepare the prompt
-            question = market.get('question', '')
-            description = market.get('description', '')
             current_prob = market.get('probability', 0.5)
-            close_time = market.get('closeTime')
             
-            prompt = self._build_prompt(
-                question=question,
-                description=description,
-                current_prob=current_prob,
-                close_time=close_time
-            )
+            # Reuse a recent analysis while the question and price bucket are unchanged
+            cache_key = self._cache_key(market.get('question', ''), current_prob)
+            hit, signal = self._cache_lookup(cache_key)
+            if hit:
+                return signal
             
             # Call Claude
-            response = self.client.messages.create(
-                model=self.model,
-                max_tokens=self.max_tokens,
-                temperature=self.temperature,
-                messages=[{
-                    "role": "user",
-                    "content": prompt
-                }]
-            )
+            response = self.client.messages.create(**self._request_params(market))
             
             # Parse response
             signal = self._parse_response(response.content[0].text, current_prob)
+            self._cache_store(cache_key, signal)
             return signal
             
         except Exception as e:
-            error_msg = str(e)
+            return self._handle_error(e)
+    
+    def analyze_batch(
+        self,
+        markets: List[Dict[str, Any]],
+        contexts: List[Dict[str, Any]]
+    ) -> List[Optional[StrategySignal]]:
+        """Analyze many markets with concurrent requests (called by StrategyEnsemble)"""
+        
+        if not self.enabled or not self.client:
+            return [None] * len(markets)
+        
+        return asyncio.run(self.analyze_many(markets))
+    
+    async def analyze_many(self, markets: List[Dict[str, Any]]) -> List[Optional[StrategySignal]]:
+        """
+        Analyze markets concurrently, at most max_concurrency requests at a time
+        
+        Args:
+            markets: Market data dictionaries
+        
+        Returns:
+            One signal (or None) per market, in input order
+        """
+        
+        if not self.enabled or not self.client:
+            return [None] * len(markets)
+        
+        # The async client's connections belong to the running event loop, so
+        # one is opened per call rather than kept on the instance
+        from anthropic import AsyncAnthropic
+        
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with AsyncAnthropic(api_key=self.api_key) as client:
+            return await asyncio.gather(
+                *(self._analyze_one(client, semaphore, market) for market in markets)
+            )
+    
+    async def _analyze_one(
+        self,
+        client: 'AsyncAnthropic',
+        semaphore: asyncio.Semaphore,
+        market: Dict[str, Any]
+    ) -> Optional[StrategySignal]:
+        """Analyze a single market on the async client"""
+        
+        try:
+            current_prob = market.get('probability', 0.5)
             
-            # Check if it's an authentication error
-            if 'authentication_error' in error_msg or '401' in error_msg:
-                logger.warning("LLM strategy disabled: Invalid Anthropic API key. Add a valid key to .env to enable.")
-                self.enabled = False  # Disable strategy to prevent repeated errors
-                return None
+            cache_key = self._cache_key(market.get('question', ''), current_prob)
+            hit, signal = self._cache_lookup(cache_key)
+            if hit:
+                return signal
+            
+            async with semaphore:
+                if not self.enabled:
+                    return None  # Disabled by an auth error on another request
+                response = await client.messages.create(**self._request_params(market))
+            
+            signal = self._parse_response(response.content[0].text, current_prob)
+            self._cache_store(cache_key, signal)
+            return signal
             
-            logger.error(f"Error in LLM analysis: {error_msg}")
+        except Exception as e:
+            return self._handle_error(e)
+    
+    def _request_params(self, market: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the messages.create arguments for a market"""
+        
+        prompt = self._build_prompt(
+            question=market.get('question', ''),
+            description=market.get('description', ''),
+            current_prob=market.get('probability', 0.5),
+            close_time=market.get('closeTime')
+        )
+        
+        return {
+            'model': self.model,
+            'max_tokens': self.max_tokens,
+            'temperature': self.temperature,
+            'messages': [{
+                "role": "user",
+                "content": prompt
+            }]
+        }
+    
+    def _handle_error(self, e: Exception) -> None:
+        """Log an analysis error, disabling the strategy on authentication failures"""
+        
+        error_msg = str(e)
+        
+        # Check if it's an authentication error
+        if 'authentication_error' in error_msg or '401' in error_msg:
+            if self.enabled:
+                logger.warning("LLM strategy disabled: Invalid Anthropic API key. Add a valid key to .env to enable.")
+            self.enabled = False  # Disable strategy to prevent repeated errors
             return None
+        
+        logger.error(f"Error in LLM analysis: {error_msg}")
+        return None
+    
+    @staticmethod
+    def _cache_key(question: str, current_prob: float) -> Tuple[str, int]:
+        """Key an analysis by question text and 5%-wide probability bucket"""
+        question_hash = hashlib.blake2b(question.encode('utf-8'), digest_size=16).hexdigest()
+        return question_hash, int(current_prob * 20)
+    
+    def _cache_lookup(self, key: Tuple[str, int]) -> Tuple[bool, Optional[StrategySignal]]:
+        """Return (hit, signal) for a cached analysis that has not expired"""
+        cached = self._cache.get(key)
+        if cached and time.monotonic() - cached[0] < self.cache_ttl:
+            self._cache.move_to_end(key)
+            return True, cached[1]
+        return False, None
+    
+    def _cache_store(self, key: Tuple[str, int], signal: Optional[StrategySignal]):
+        """Cache an analysis, evicting the least recently used beyond cache_size"""
+        self._cache[key] = (time.monotonic(), signal)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+    
+    def clear_cache(self):
+        """Drop all cached analyses"""
+        self._cache.clear()
     
     def _build_prompt(
         self,
@@ -135,41 +279,11 @@ Now analyze the question above:"""
         """Parse Claude's response into a StrategySignal"""
         
         try:
-            lines = response.strip().split('\n')
-            parsed = {}
-            
-            for line in lines:
-                line = line.strip()
-                if line.startswith('PROBABILITY:'):
-                    prob_str = line.split(':', 1)[1].strip()
-                    parsed['probability'] = float(prob_str)
-                elif line.startswith('CONFIDENCE:'):
-                    conf_str = line.split(':', 1)[1].strip()
-                    parsed['confidence'] = float(conf_str)
-                elif line.startswith('DIRECTION:'):
-                    dir_str = line.split(':', 1)[1].strip().upper()
-                    parsed['direction'] = dir_str
-                elif line.startswith('REASONING:'):
-                    reasoning_str = line.split(':', 1)[1].strip()
-                    parsed['reasoning'] = reasoning_str
-                elif line.startswith('STRENGTH:'):
-                    strength_str = line.split(':', 1)[1].strip()
-                    parsed['strength'] = float(strength_str)
-            
-            # Collect any reasoning that spans multiple lines
-            reasoning_started = False
-            full_reasoning = []
-            for line in lines:
-                if line.startswith('REASONING:'):
-                    reasoning_started = True
-                    full_reasoning.append(line.split(':', 1)[1].strip())
-                elif reasoning_started and line.startswith('STRENGTH:'):
-                    break
-                elif reasoning_started and line.strip():
-                    full_reasoning.append(line.strip())
-            
-            if full_reasoning:
-                parsed['reasoning'] = ' '.join(full_reasoning)
+            fields = {
+                m.group('key').lower(): m.group('val')
+                for m in _RESPONSE_RE.finditer(response)
+            }
+            parsed = {key: _FIELD_CASTS[key](value) for key, value in fields.items()}
             
             # Validate required fields
             required = ['probability', 'confidence', 'direction', 'reasoning']
@@ -177,6 +291,15 @@ Now analyze the question above:"""
                 logger.error(f"Missing required fields in LLM response: {parsed.keys()}")
                 return None
             
+            if parsed['direction'] not in ('YES', 'NO'):
+                logger.error(f"Invalid direction in LLM response: {parsed['direction']}")
+                return None
+            
+            # Keep numeric fields within 0-1 even if the model strays outside them
+            for key in ('probability', 'confidence', 'strength'):
+                if key in parsed:
+                    parsed[key] = min(1.0, max(0.0, parsed[key]))
+            
             # Use default strength if not provided
             if 'strength' not in parsed:
                 # Calculate strength based on edge and confidence
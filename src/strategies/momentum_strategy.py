@@ -2,28 +2,117 @@
 Momentum Trading Strategy
 Follows probability trends and momentum indicators
 """
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, Tuple, Union, Sequence
+from collections import deque
+from itertools import islice
 import logging
-import sys
-from pathlib import Path
+import numpy as np
 
-# Add parent directory to path for imports
-sys.path.insert(0, str(Path(__file__).parent.parent))
-
-from strategies.base_strategy import BaseStrategy, StrategySignal
+from .base_strategy import BaseStrategy, StrategySignal
 
 logger = logging.getLogger(__name__)
 
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+
+def _indicators_loop(
+    y: np.ndarray,
+    lookbacks: np.ndarray,
+    rsi_period: int,
+    weights: np.ndarray
+) -> Tuple[float, float, float]:
+    """
+    Scalar-loop version of MomentumStrategy._compute_indicators for Numba
+    
+    Args:
+        y: Probability series (float64)
+        lookbacks: Momentum lookback periods (int64)
+        rsi_period: Number of changes the RSI looks at
+        weights: Momentum weights by position among the usable lookbacks (float64)
+    
+    Returns:
+        (momentum score, RSI 0-100, trend strength 0-1)
+    """
+    n = y.shape[0]
+    
+    momentum = 0.0
+    if n > 0:
+        total = 0.0
+        weight_sum = 0.0
+        used = 0
+        for j in range(lookbacks.shape[0]):
+            period = lookbacks[j]
+            if period <= n:
+                past = y[n - period] if period > 0 else y[0]
+                total += weights[used] * (y[n - 1] - past) / max(period, 1)
+                weight_sum += weights[used]
+                used += 1
+        if used > 0:
+            momentum = total / weight_sum
+    
+    rsi = 50.0
+    if n >= rsi_period + 1:
+        gains = 0.0
+        losses = 0.0
+        for i in range(n - rsi_period, n):
+            change = y[i] - y[i - 1]
+            if change > 0:
+                gains += change
+            elif change < 0:
+                losses -= change
+        if losses == 0:
+            rsi = 100.0
+        else:
+            rsi = 100 - 100 / (1 + gains / losses)
+    
+    trend_strength = 0.0
+    if n >= 2:
+        y_mean = 0.0
+        for i in range(n):
+            y_mean += y[i]
+        y_mean /= n
+        sxx = n * (n * n - 1) / 12
+        sxy = 0.0
+        syy = 0.0
+        for i in range(n):
+            dy = y[i] - y_mean
+            sxy += i * dy
+            syy += dy * dy
+        if syy > 0:
+            trend_strength = min(1.0, max(0.0, sxy * sxy / (sxx * syy)))
+    
+    return momentum, rsi, trend_strength
+
+
+if HAS_NUMBA:
+    _indicators_kernel = njit(cache=True, fastmath=True)(_indicators_loop)
+
 
 class MomentumStrategy(BaseStrategy):
     """Strategy that follows probability momentum and trends"""
     
+    __slots__ = (
+        'lookback_periods', 'rsi_period', 'momentum_threshold',
+        '_lookbacks_arr', '_weights_arr', '_max_history'
+    )
+    
     def __init__(self, **kwargs):
         # Extract momentum-specific config
         self.lookback_periods = kwargs.pop('lookback_periods', [5, 10, 20])
         self.rsi_period = kwargs.pop('rsi_period', 14)
         self.momentum_threshold = kwargs.pop('momentum_threshold', 0.05)
         
+        # Longest window any indicator looks back over
+        self._max_history = max(max(self.lookback_periods), self.rsi_period + 1)
+        
+        # Stable array types for the compiled kernel
+        self._lookbacks_arr = np.asarray(self.lookback_periods, dtype=np.int64)
+        self._weights_arr = 1 / np.arange(1, len(self.lookback_periods) + 1, dtype=np.float64)
+        
         # Initialize parent
         super().__init__(name='Momentum Trader', **kwargs)
     
@@ -39,10 +128,8 @@ class MomentumStrategy(BaseStrategy):
         
         current_prob = market.get('probability', 0.5)
         
-        # Calculate momentum indicators
-        momentum_score = self._calculate_momentum(prob_history)
-        rsi = self._calculate_rsi(prob_history)
-        trend_strength = self._calculate_trend_strength(prob_history)
+        # Calculate momentum indicators in one pass over the probability array
+        momentum_score, rsi, trend_strength = self._compute_indicators(self._probs(prob_history))
         
         # Determine signal
         if momentum_score > self.momentum_threshold and rsi < 70:
@@ -82,31 +169,68 @@ class MomentumStrategy(BaseStrategy):
             strength=strength
         )
     
-    def _calculate_momentum(self, history: List[Dict]) -> float:
-        """Calculate probability momentum across multiple timeframes"""
+    def make_history_buffer(self) -> deque:
+        """
+        Create a bounded buffer for feeding probability_history incrementally
         
-        if not history:
-            return 0.0
+        Appending history points keeps only the most recent window the momentum
+        and RSI lookbacks need. Trend strength is then measured over that window
+        rather than the full history.
+        """
+        return deque(maxlen=self._max_history)
+    
+    @staticmethod
+    def _probs(history: Sequence[Dict]) -> np.ndarray:
+        """Extract the probability series from history points"""
+        return np.fromiter(
+            (h.get('probability', 0.5) for h in history),
+            dtype=np.float64,
+            count=len(history)
+        )
+    
+    def _compute_indicators(self, y: np.ndarray, rsi_period: int = None) -> Tuple[float, float, float]:
+        """
+        Calculate momentum, RSI and trend strength from one probability array
         
-        current_prob = history[-1].get('probability', 0.5)
-        momentum_scores = []
+        Returns:
+            (momentum score, RSI 0-100, trend strength 0-1)
+        """
+        if rsi_period is None:
+            rsi_period = self.rsi_period
         
-        for period in self.lookback_periods:
-            if len(history) >= period:
-                past_prob = history[-period].get('probability', current_prob)
-                momentum = (current_prob - past_prob) / max(period, 1)
-                momentum_scores.append(momentum)
+        if HAS_NUMBA:
+            return _indicators_kernel(
+                np.asarray(y, dtype=np.float64), self._lookbacks_arr, rsi_period, self._weights_arr
+            )
+        
+        return (
+            self._calculate_momentum(y),
+            self._calculate_rsi(y, rsi_period),
+            self._calculate_trend_strength(y)
+        )
+    
+    def _calculate_momentum(self, history: Union[np.ndarray, Sequence[Dict]]) -> float:
+        """Calculate probability momentum across multiple timeframes"""
+        y = history if isinstance(history, np.ndarray) else self._probs(history)
+        n = len(y)
         
-        # Weighted average favoring shorter timeframes
-        if momentum_scores:
-            weights = [1 / (i + 1) for i in range(len(momentum_scores))]
-            weighted_momentum = sum(m * w for m, w in zip(momentum_scores, weights)) / sum(weights)
-            return weighted_momentum
+        # Weighted towards shorter timeframes
+        periods = np.array(self.lookback_periods)
+        periods = periods[periods <= n]
+        if not n or not len(periods):
+            return 0.0
         
-        return 0.0
+        momenta = (y[-1] - y[-periods]) / np.maximum(periods, 1)
+        weights = 1 / np.arange(1, len(momenta) + 1)
+        return float(momenta @ weights / weights.sum())
     
-    def _calculate_rsi(self, history: List[Dict], period: int = None) -> float:
-        """Calculate Relative Strength Index"""
+    def _calculate_rsi(self, history: Union[np.ndarray, Sequence[Dict]], period: int = None) -> float:
+        """
+        Calculate Relative Strength Index
+        
+        Only the last period + 1 points are read, so a list of history dicts is
+        converted just for that tail.
+        """
         
         if period is None:
             period = self.rsi_period
@@ -114,63 +238,39 @@ class MomentumStrategy(BaseStrategy):
         if len(history) < period + 1:
             return 50.0  # Neutral RSI
         
-        # Get probability changes
-        changes = []
-        for i in range(len(history) - period, len(history)):
-            if i > 0:
-                change = history[i].get('probability', 0.5) - history[i-1].get('probability', 0.5)
-                changes.append(change)
-        
-        if not changes:
-            return 50.0
+        if isinstance(history, np.ndarray):
+            tail = history[-period - 1:]
+        else:
+            # islice also handles deque buffers, which can't be sliced
+            tail = self._probs(list(islice(history, len(history) - period - 1, None)))
         
         # Calculate gains and losses
-        gains = [c for c in changes if c > 0]
-        losses = [-c for c in changes if c < 0]
-        
-        avg_gain = sum(gains) / period if gains else 0
-        avg_loss = sum(losses) / period if losses else 0
-        
+        changes = np.diff(tail)
+        avg_loss = -changes[changes < 0].sum() / period
         if avg_loss == 0:
             return 100.0
         
-        rs = avg_gain / avg_loss
-        rsi = 100 - (100 / (1 + rs))
-        
-        return rsi
+        avg_gain = changes[changes > 0].sum() / period
+        return float(100 - (100 / (1 + avg_gain / avg_loss)))
     
-    def _calculate_trend_strength(self, history: List[Dict]) -> float:
-        """Calculate overall trend strength (0-1)"""
-        
-        if len(history) < 2:
-            return 0.0
-        
-        # Linear regression to find trend
-        n = len(history)
-        x = list(range(n))
-        y = [h.get('probability', 0.5) for h in history]
+    def _calculate_trend_strength(self, history: Union[np.ndarray, Sequence[Dict]]) -> float:
+        """
+        Calculate overall trend strength (0-1)
         
-        # Calculate slope
-        x_mean = sum(x) / n
-        y_mean = sum(y) / n
-        
-        numerator = sum((x[i] - x_mean) * (y[i] - y_mean) for i in range(n))
-        denominator = sum((x[i] - x_mean) ** 2 for i in range(n))
-        
-        if denominator == 0:
+        This is the R-squared of a linear fit (how well data fits the trend).
+        For x = 0..n-1, var(x) = (n^2 - 1) / 12 and R^2 = slope^2 * var(x) / var(y)
+        """
+        y = history if isinstance(history, np.ndarray) else self._probs(history)
+        n = len(y)
+        if n < 2:
             return 0.0
         
-        slope = numerator / denominator
-        
-        # Calculate R-squared
-        y_pred = [y_mean + slope * (x[i] - x_mean) for i in range(n)]
-        ss_res = sum((y[i] - y_pred[i]) ** 2 for i in range(n))
-        ss_tot = sum((y[i] - y_mean) ** 2 for i in range(n))
-        
-        if ss_tot == 0:
+        y_dev = y - y.mean()
+        var_y = (y_dev @ y_dev) / n
+        if var_y <= 0:
             return 0.0
         
-        r_squared = 1 - (ss_res / ss_tot)
-        
-        # Trend strength is R-squared (how well data fits the trend)
-        return max(0.0, min(1.0, r_squared))
\ No newline at end of file
+        var_x = (n * n - 1) / 12
+        cov_xy = (np.arange(n) @ y_dev) / n  # sum(y_dev) == 0, so x needn't be centred
+        slope = cov_xy / var_x
+        return float(max(0.0, min(1.0, slope * slope * var_x / var_y)))
\ No newline at end of file
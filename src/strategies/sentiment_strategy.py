@@ -2,22 +2,79 @@
 Sentiment Trading Strategy
 Analyzes comment sentiment and trading activity patterns
 """
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Tuple
 import logging
-import sys
-from pathlib import Path
+import re
+import numpy as np
 
-# Add parent directory to path for imports
-sys.path.insert(0, str(Path(__file__).parent.parent))
+from .base_strategy import BaseStrategy, StrategySignal
 
-from strategies.base_strategy import BaseStrategy, StrategySignal
+try:
+    import ahocorasick
+    HAS_AHOCORASICK = True
+except ImportError:
+    HAS_AHOCORASICK = False
 
 logger = logging.getLogger(__name__)
 
+# Simple keyword-based sentiment (demonstration only)
+# Single words are matched against whole tokens, so 'no' does not fire on 'know'
+POSITIVE_KEYWORDS = frozenset({
+    'yes', 'definitely', 'likely', 'probable', 'confident', 'will',
+    'expect', 'sure', 'positive', 'bullish', 'agree', 'correct'
+})
+
+NEGATIVE_KEYWORDS = frozenset({
+    'no', 'unlikely', 'doubtful', 'won\'t', 'impossible', 'bearish',
+    'disagree', 'wrong', 'negative', 'improbable'
+})
+
+# Multi-word phrases are matched within the text
+POSITIVE_PHRASES = ()
+NEGATIVE_PHRASES = ('won\'t happen',)
+
+_TOKEN_RE = re.compile(r"[a-z]+(?:'[a-z]+)*")
+
+
+def _build_phrase_automaton():
+    """Compile both phrase lists into one automaton mapping each phrase to (id, is_positive)"""
+    automaton = ahocorasick.Automaton()
+    for idx, phrase in enumerate(POSITIVE_PHRASES + NEGATIVE_PHRASES):
+        automaton.add_word(phrase, (idx, idx < len(POSITIVE_PHRASES)))
+    automaton.make_automaton()
+    return automaton
+
+
+# Built once per process and shared by every strategy instance
+_PHRASE_AUTOMATON = _build_phrase_automaton() if HAS_AHOCORASICK else None
+
+# Outcome codes for bincount: YES and NO volumes land in bins 0 and 1
+_OUTCOME_CODES = {'YES': 0, 'NO': 1}
+_OTHER_OUTCOME = 2
+
+
+def _bets_to_arrays(bets: List[Dict]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Split bets into parallel arrays
+    
+    Returns:
+        Bet amounts, and the outcome code of each bet (0 for YES, 1 for NO, 2 otherwise)
+    """
+    n = len(bets)
+    amount = np.fromiter((bet.get('amount', 0) for bet in bets), dtype=np.float64, count=n)
+    outcome = np.fromiter(
+        (_OUTCOME_CODES.get(bet.get('outcome'), _OTHER_OUTCOME) for bet in bets),
+        dtype=np.int8,
+        count=n
+    )
+    return amount, outcome
+
 
 class SentimentStrategy(BaseStrategy):
     """Strategy that analyzes market sentiment from comments and activity"""
     
+    __slots__ = ('min_comments', 'sentiment_threshold')
+    
     def __init__(self, **kwargs):
         # Extract sentiment-specific config
         self.min_comments = kwargs.pop('min_comments', 3)
@@ -33,7 +90,8 @@ class SentimentStrategy(BaseStrategy):
         bets = kwargs.get('bets', [])
         
         if len(comments) < self.min_comments:
-            logger.debug(f"Insufficient comments for sentiment analysis: {len(comments)}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Insufficient comments for sentiment analysis: {len(comments)}")
             return None
         
         # Analyze comment sentiment
@@ -42,6 +100,94 @@ class SentimentStrategy(BaseStrategy):
         # Analyze trading activity sentiment
         trading_sentiment = self._analyze_trading_sentiment(bets)
         
+        return self._build_signal(
+            market, comment_sentiment, trading_sentiment, len(comments), len(bets)
+        )
+    
+    def analyze_batch(
+        self,
+        markets: List[Dict[str, Any]],
+        contexts: List[Dict[str, Any]]
+    ) -> List[Optional[StrategySignal]]:
+        """
+        Analyze many markets at once (called by StrategyEnsemble)
+        
+        Keyword counts for every scored comment, and the recent bets of every
+        market, are laid out in flat arrays with a market index per entry, so
+        the per-market averages and volumes are a few bincount reductions
+        instead of small Python loops per market.
+        """
+        
+        signals: List[Optional[StrategySignal]] = [None] * len(markets)
+        
+        debug = logger.isEnabledFor(logging.DEBUG)
+        eligible = []
+        for i, context in enumerate(contexts):
+            num_comments = len(context.get('comments', []))
+            if num_comments >= self.min_comments:
+                eligible.append(i)
+            elif debug:
+                logger.debug(f"Insufficient comments for sentiment analysis: {num_comments}")
+        if not eligible:
+            return signals
+        
+        # Comment sentiment: one entry per recent comment
+        comment_market, pos, neg = [], [], []
+        for j, i in enumerate(eligible):
+            for comment in contexts[i].get('comments', [])[-20:]:
+                p, n = self._count_keywords(comment.get('text', '').lower())
+                comment_market.append(j)
+                pos.append(p)
+                neg.append(n)
+        
+        comment_market = np.array(comment_market, dtype=np.intp)
+        pos_arr = np.array(pos, dtype=np.float64)
+        neg_arr = np.array(neg, dtype=np.float64)
+        scored = (pos_arr + neg_arr) > 0
+        scores = np.where(scored, pos_arr / (pos_arr + neg_arr + 1), 0.0)
+        
+        num_eligible = len(eligible)
+        score_sum = np.bincount(comment_market, weights=scores, minlength=num_eligible)
+        num_scored = np.bincount(comment_market, weights=scored, minlength=num_eligible)
+        comment_sentiment = np.divide(
+            score_sum, num_scored, out=np.full(num_eligible, 0.5), where=num_scored > 0
+        )
+        
+        # Trading sentiment: one entry per recent bet
+        recent_bets = [contexts[i].get('bets', [])[:20] for i in eligible]
+        bet_market = np.repeat(np.arange(num_eligible), [len(bets) for bets in recent_bets])
+        amount, outcome = _bets_to_arrays([bet for bets in recent_bets for bet in bets])
+        # One bincount over (market, outcome) pairs gives every market's volumes
+        volumes = np.bincount(
+            bet_market * 3 + outcome, weights=amount, minlength=num_eligible * 3
+        ).reshape(num_eligible, 3)
+        yes_volume, no_volume = volumes[:, 0], volumes[:, 1]
+        total_volume = yes_volume + no_volume
+        trading_sentiment = np.divide(
+            yes_volume, total_volume, out=np.full(num_eligible, 0.5), where=total_volume != 0
+        )
+        
+        for j, i in enumerate(eligible):
+            signals[i] = self._build_signal(
+                markets[i],
+                float(comment_sentiment[j]),
+                float(trading_sentiment[j]),
+                len(contexts[i].get('comments', [])),
+                len(contexts[i].get('bets', []))
+            )
+        
+        return signals
+    
+    def _build_signal(
+        self,
+        market: Dict[str, Any],
+        comment_sentiment: float,
+        trading_sentiment: float,
+        num_comments: int,
+        num_bets: int
+    ) -> Optional[StrategySignal]:
+        """Turn comment and trading sentiment into a signal if they diverge from the market"""
+        
         # Combine sentiments
         combined_sentiment = (comment_sentiment * 0.6 + trading_sentiment * 0.4)
         
@@ -63,7 +209,7 @@ class SentimentStrategy(BaseStrategy):
             estimated_prob = max(0.05, current_prob - divergence * 0.5)
         
         # Confidence based on comment count and sentiment strength
-        confidence = self._calculate_confidence(len(comments), len(bets), divergence)
+        confidence = self._calculate_confidence(num_comments, num_bets, divergence)
         
         reasoning = (
             f"Sentiment analysis: {sentiment_prob:.1%} (comments: {comment_sentiment:.1%}, "
@@ -92,24 +238,12 @@ class SentimentStrategy(BaseStrategy):
         if not comments:
             return 0.5
         
-        # Simple keyword-based sentiment (demonstration only)
-        positive_keywords = [
-            'yes', 'definitely', 'likely', 'probable', 'confident', 'will',
-            'expect', 'sure', 'positive', 'bullish', 'agree', 'correct'
-        ]
-        
-        negative_keywords = [
-            'no', 'unlikely', 'doubtful', 'won\'t', 'impossible', 'bearish',
-            'disagree', 'wrong', 'negative', 'won\'t happen', 'improbable'
-        ]
-        
         sentiment_scores = []
         
         for comment in comments[-20:]:  # Look at recent 20 comments
             text = comment.get('text', '').lower()
             
-            pos_count = sum(1 for word in positive_keywords if word in text)
-            neg_count = sum(1 for word in negative_keywords if word in text)
+            pos_count, neg_count = self._count_keywords(text)
             
             if pos_count > 0 or neg_count > 0:
                 # Normalize to 0-1 range
@@ -124,6 +258,23 @@ class SentimentStrategy(BaseStrategy):
         
         return avg_sentiment
     
+    def _count_keywords(self, text: str) -> Tuple[int, int]:
+        """Count the distinct positive and negative keywords found in lower-cased text"""
+        
+        tokens = set(_TOKEN_RE.findall(text))
+        pos_count = len(POSITIVE_KEYWORDS & tokens)
+        neg_count = len(NEGATIVE_KEYWORDS & tokens)
+        
+        if _PHRASE_AUTOMATON is not None:
+            # One linear pass over the text finds every phrase at once
+            matched = {value for _, value in _PHRASE_AUTOMATON.iter(text)}
+            pos_phrases = sum(1 for _, is_positive in matched if is_positive)
+            return pos_count + pos_phrases, neg_count + len(matched) - pos_phrases
+        
+        pos_count += sum(1 for phrase in POSITIVE_PHRASES if phrase in text)
+        neg_count += sum(1 for phrase in NEGATIVE_PHRASES if phrase in text)
+        return pos_count, neg_count
+    
     def _analyze_trading_sentiment(self, bets: List[Dict]) -> float:
         """Analyze sentiment from recent trading activity"""
         
@@ -131,10 +282,11 @@ class SentimentStrategy(BaseStrategy):
             return 0.5
         
         # Look at recent bets (last 20)
-        recent_bets = bets[:20]
+        amount, outcome = _bets_to_arrays(bets[:20])
         
-        yes_volume = sum(bet.get('amount', 0) for bet in recent_bets if bet.get('outcome') == 'YES')
-        no_volume = sum(bet.get('amount', 0) for bet in recent_bets if bet.get('outcome') == 'NO')
+        volumes = np.bincount(outcome, weights=amount, minlength=2)
+        yes_volume = float(volumes[0])
+        no_volume = float(volumes[1])
         
         total_volume = yes_volume + no_volume
         
@@ -154,15 +306,17 @@ class SentimentStrategy(BaseStrategy):
     ) -> float:
         """Calculate confidence in sentiment signal"""
         
+        # Weighted 0.4 / 0.3 / 0.3; the weights are folded into each factor's scale and cap
+        
         # More comments = higher confidence
-        comment_factor = min(1.0, num_comments / 10)
+        comment_term = min(0.4, num_comments * 0.04)
         
         # More bets = higher confidence
-        bet_factor = min(1.0, num_bets / 20)
+        bet_term = min(0.3, num_bets * 0.015)
         
         # Larger divergence = higher confidence
-        divergence_factor = min(1.0, divergence * 2)
+        divergence_term = min(0.3, divergence * 0.6)
         
-        confidence = (comment_factor * 0.4 + bet_factor * 0.3 + divergence_factor * 0.3)
+        confidence = comment_term + bet_term + divergence_term
         
-        return max(0.2, min(0.8, confidence))
\ No newline at end of file
+        return 0.2 if confidence < 0.2 else (0.8 if confidence > 0.8 else confidence)
\ No newline at end of file
@@ -4,13 +4,9 @@ Identifies mispriced markets based on fundamental analysis
 """
 from typing import Dict, Any, Optional, List
 import logging
-import sys
-from pathlib import Path
 
-# Add parent directory to path for imports
-sys.path.insert(0, str(Path(__file__).parent.parent))
-
-from strategies.base_strategy import BaseStrategy, StrategySignal
+from .base_strategy import BaseStrategy, StrategySignal
+from utils.market_view import MarketView
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +14,8 @@ logger = logging.getLogger(__name__)
 class ValueStrategy(BaseStrategy):
     """Strategy that looks for fundamental value mismatches"""
     
+    __slots__ = ('min_liquidity', 'min_traders', 'value_threshold')
+    
     def __init__(self, **kwargs):
         # Extract value-specific config
         self.min_liquidity = kwargs.pop('min_liquidity', 100)
@@ -30,19 +28,21 @@ class ValueStrategy(BaseStrategy):
     def analyze(self, market: Dict[str, Any], **kwargs) -> Optional[StrategySignal]:
         """Look for fundamental value opportunities"""
         
-        current_prob = market.get('probability', 0.5)
-        volume = market.get('volume', 0)
-        num_traders = market.get('uniqueBettorCount', 0)
-        liquidity = market.get('pool', {})
-        total_liquidity = liquidity.get('YES', 0) + liquidity.get('NO', 0)
+        # StrategyEnsemble passes a view built once per market
+        view = kwargs.get('view') or MarketView.from_raw(market)
+        
+        current_prob = view.probability
+        num_traders = view.num_traders
+        total_liquidity = view.yes_pool + view.no_pool
         
         # Skip illiquid or low-participation markets
         if total_liquidity < self.min_liquidity or num_traders < self.min_traders:
-            logger.debug(f"Insufficient liquidity or traders: {total_liquidity}, {num_traders}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Insufficient liquidity or traders: {total_liquidity}, {num_traders}")
             return None
         
         # Estimate fundamental value based on market characteristics
-        fundamental_value = self._estimate_fundamental_value(market, **kwargs)
+        fundamental_value = self._estimate_fundamental_value(view, **kwargs)
         
         if fundamental_value is None:
             return None
@@ -78,16 +78,16 @@ class ValueStrategy(BaseStrategy):
             strength=min(1.0, value_gap * 2)
         )
     
-    def _estimate_fundamental_value(self, market: Dict[str, Any], **kwargs) -> Optional[float]:
+    def _estimate_fundamental_value(self, market: MarketView, **kwargs) -> Optional[float]:
         """
         Estimate fundamental value of the market
         This is a simplified version - in production, this would use more sophisticated analysis
         """
         
         # Get market metadata
-        question = market.get('question', '').lower()
-        description = market.get('description', '').lower()
-        close_time = market.get('closeTime')
+        question = market.question_lc
+        description = market.description_lc
+        close_time = market.close_time_ms
         
         # Simple heuristics for demonstration
         # In production, this would analyze:
@@ -98,10 +98,10 @@ class ValueStrategy(BaseStrategy):
         # - Statistical models
         
         # For now, use a simple approach based on market characteristics
-        current_prob = market.get('probability', 0.5)
+        current_prob = market.probability
         
         # Check if market seems overconfident (very high/low probability with low participation)
-        num_traders = market.get('uniqueBettorCount', 0)
+        num_traders = market.num_traders
         
         if num_traders < 10:
             # Low participation markets may have inefficient pricing
@@ -123,15 +123,17 @@ class ValueStrategy(BaseStrategy):
     ) -> float:
         """Calculate confidence in the value estimate"""
         
+        # Weighted 0.3 / 0.3 / 0.4; the weights are folded into each factor's scale and cap
+        
         # Lower confidence in very liquid markets (harder to move)
-        liquidity_factor = max(0.3, 1.0 - min(1.0, liquidity / 1000))
+        liquidity_term = max(0.09, 0.3 - min(0.3, liquidity * 0.0003))
         
         # Higher confidence with reasonable participation
-        trader_factor = min(1.0, num_traders / 20)
+        trader_term = min(0.3, num_traders * 0.015)
         
         # Higher confidence with larger value gaps
-        gap_factor = min(1.0, value_gap * 2)
+        gap_term = min(0.4, value_gap * 0.8)
         
-        confidence = (liquidity_factor * 0.3 + trader_factor * 0.3 + gap_factor * 0.4)
+        confidence = liquidity_term + trader_term + gap_term
         
-        return max(0.2, min(0.9, confidence))
\ No newline at end of file
+        return 0.2 if confidence < 0.2 else (0.9 if confidence > 0.9 else confidence)
\ No newline at end of file
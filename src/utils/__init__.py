@@ -4,9 +4,12 @@ from .market_analyzer import (
     calculate_liquidity_score,
     calculate_market_efficiency,
     get_time_to_close,
+    get_time_to_close_batch,
     categorize_market,
     extract_market_features,
 )
+from .market_view import MarketView, as_market_view
+from .serialization import json_dumps, json_loads
 
 __all__ = [
     'setup_logger',
@@ -15,7 +18,12 @@ __all__ = [
     'calculate_liquidity_score',
     'calculate_market_efficiency',
     'get_time_to_close',
+    'get_time_to_close_batch',
     'categorize_market',
     'extract_market_features',
+    'MarketView',
+    'as_market_view',
+    'json_dumps',
+    'json_loads',
 ]
 logger = get_logger(__name__)
\ No newline at end of file
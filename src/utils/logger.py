@@ -1,8 +1,11 @@
 """
 Logging utilities for the trading bot
 """
+import atexit
 import logging
+import queue
 import sys
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 from typing import Optional
 
@@ -11,7 +14,8 @@ def setup_logger(
     name: str,
     log_file: Optional[str] = None,
     level: int = logging.INFO,
-    console: bool = True
+    console: bool = True,
+    queued: bool = False
 ) -> logging.Logger:
     """
     Setup a logger with file and console handlers
@@ -21,6 +25,10 @@ def setup_logger(
         log_file: Optional log file path
         level: Logging level (default: INFO)
         console: Whether to add console handler (default: True)
+        queued: Opt-in; hand records to a background thread that writes them to
+            the console and file, so logging calls don't block on that I/O. The
+            message is still formatted on the calling thread, by
+            QueueHandler.prepare() (default: False)
     
     Returns:
         Configured logger instance
@@ -32,6 +40,8 @@ def setup_logger(
     if logger.handlers:
         return logger
     
+    handlers = []
+    
     formatter = logging.Formatter(
         '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
         datefmt='%Y-%m-%d %H:%M:%S'
@@ -42,7 +52,7 @@ def setup_logger(
         console_handler = logging.StreamHandler(sys.stdout)
         console_handler.setLevel(level)
         console_handler.setFormatter(formatter)
-        logger.addHandler(console_handler)
+        handlers.append(console_handler)
     
     # File handler
     if log_file:
@@ -52,7 +62,18 @@ def setup_logger(
         file_handler = logging.FileHandler(log_file)
         file_handler.setLevel(level)
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        handlers.append(file_handler)
+    
+    if queued and handlers:
+        log_queue = queue.SimpleQueue()
+        listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        # Flush whatever is still queued on interpreter exit
+        atexit.register(listener.stop)
+        logger.addHandler(QueueHandler(log_queue))
+    else:
+        for handler in handlers:
+            logger.addHandler(handler)
     
     return logger
 
@@ -2,19 +2,53 @@
 Market analysis utilities
 Helper functions for analyzing market data
 """
-from typing import Dict, List, Any, Optional
-from datetime import datetime
+from typing import Dict, List, Any, Optional, Union
 import logging
+import math
+import sys
+import time
+import numpy as np
+
+from .market_view import MarketView, as_market_view
 
 logger = logging.getLogger(__name__)
 
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+
+def _volatility_loop(probs: np.ndarray) -> float:
+    """
+    Single-pass (Welford) standard deviation of absolute probability changes
+    
+    Written as a scalar loop so Numba can compile it; see calculate_volatility.
+    """
+    mean = 0.0
+    m2 = 0.0
+    for i in range(1, probs.shape[0]):
+        change = abs(probs[i] - probs[i - 1])
+        delta = change - mean
+        mean += delta / i
+        m2 += delta * (change - mean)
+    return math.sqrt(m2 / (probs.shape[0] - 1))
+
 
-def calculate_volatility(probability_history: List[Dict]) -> float:
+if HAS_NUMBA:
+    _volatility_kernel = njit(cache=True, fastmath=True)(_volatility_loop)
+    # Compile on import rather than on the first scan
+    _volatility_kernel(np.zeros(2))
+
+
+def calculate_volatility(probability_history: Union[List[Dict], np.ndarray]) -> float:
     """
     Calculate probability volatility
     
     Args:
-        probability_history: List of probability data points
+        probability_history: List of probability data points, or an array
+            of the probabilities themselves
     
     Returns:
         Volatility measure (0-1)
@@ -22,42 +56,38 @@ def calculate_volatility(probability_history: List[Dict]) -> float:
     if len(probability_history) < 2:
         return 0.0
     
-    # Calculate standard deviation of probability changes
-    changes = []
-    for i in range(1, len(probability_history)):
-        change = abs(
-            probability_history[i].get('probability', 0.5) - 
-            probability_history[i-1].get('probability', 0.5)
+    if isinstance(probability_history, np.ndarray):
+        # Already extracted (e.g. by a strategy); no per-point lookups needed
+        probs = probability_history.astype(np.float64, copy=False)
+    else:
+        probs = np.fromiter(
+            (point.get('probability', 0.5) for point in probability_history),
+            dtype=np.float64,
+            count=len(probability_history)
         )
-        changes.append(change)
     
-    if not changes:
-        return 0.0
+    # Standard deviation of probability changes
+    if HAS_NUMBA:
+        return float(_volatility_kernel(probs))
     
-    mean_change = sum(changes) / len(changes)
-    variance = sum((c - mean_change) ** 2 for c in changes) / len(changes)
-    volatility = variance ** 0.5
-    
-    return volatility
+    return float(np.abs(np.diff(probs)).std())
 
 
-def calculate_liquidity_score(market: Dict[str, Any]) -> float:
+def calculate_liquidity_score(market: Union[Dict[str, Any], MarketView]) -> float:
     """
     Calculate market liquidity score (0-1)
     
     Args:
-        market: Market data dictionary
+        market: Market data dictionary or view
     
     Returns:
         Liquidity score
     """
-    pool = market.get('pool', {})
-    yes_pool = pool.get('YES', 0)
-    no_pool = pool.get('NO', 0)
-    total_liquidity = yes_pool + no_pool
+    market = as_market_view(market)
+    total_liquidity = market.yes_pool + market.no_pool
     
-    volume = market.get('volume', 0)
-    num_traders = market.get('uniqueBettorCount', 0)
+    volume = market.volume
+    num_traders = market.num_traders
     
     # Normalize factors
     liquidity_factor = min(1.0, total_liquidity / 1000)
@@ -74,20 +104,28 @@ def calculate_liquidity_score(market: Dict[str, Any]) -> float:
     return score
 
 
-def calculate_market_efficiency(market: Dict[str, Any], history: List[Dict]) -> float:
+def calculate_market_efficiency(
+    market: Union[Dict[str, Any], MarketView],
+    history: Optional[List[Dict]] = None,
+    *,
+    volatility: Optional[float] = None
+) -> float:
     """
     Estimate market efficiency (how well-priced it is)
     
     Args:
-        market: Current market data
+        market: Current market data or view
         history: Probability history
+        volatility: Precomputed calculate_volatility(history), if already known
     
     Returns:
         Efficiency score (0-1), higher = more efficient
     """
-    num_traders = market.get('uniqueBettorCount', 0)
-    volume = market.get('volume', 0)
-    volatility = calculate_volatility(history)
+    market = as_market_view(market)
+    num_traders = market.num_traders
+    volume = market.volume
+    if volatility is None:
+        volatility = calculate_volatility(history or [])
     
     # More traders and volume = more efficient
     # Lower volatility = more stable/efficient
@@ -105,83 +143,117 @@ def calculate_market_efficiency(market: Dict[str, Any], history: List[Dict]) ->
     return min(1.0, max(0.0, efficiency))
 
 
-def get_time_to_close(market: Dict[str, Any]) -> Optional[int]:
+def get_time_to_close(market: Union[Dict[str, Any], MarketView]) -> Optional[int]:
     """
     Get time remaining until market closes (in hours)
     
     Args:
-        market: Market data dictionary
+        market: Market data dictionary or view
     
     Returns:
         Hours until close, or None if no close time
     """
-    close_time = market.get('closeTime')
+    close_time = as_market_view(market).close_time_ms
     if not close_time:
         return None
     
     # close_time is in milliseconds
-    close_datetime = datetime.fromtimestamp(close_time / 1000)
-    now = datetime.now()
-    
-    time_delta = close_datetime - now
-    hours = time_delta.total_seconds() / 3600
+    hours = (close_time - time.time() * 1000) / 3_600_000
     
     return max(0, hours)
 
 
-def categorize_market(market: Dict[str, Any]) -> str:
+def get_time_to_close_batch(markets: List[Dict[str, Any]]) -> np.ndarray:
+    """
+    Get hours until close for many markets at once
+    
+    Args:
+        markets: Market data dictionaries
+    
+    Returns:
+        Hours until close per market, NaN where there is no close time
+    """
+    close_times = np.fromiter(
+        (market.get('closeTime') or 0 for market in markets),
+        dtype=np.int64,
+        count=len(markets)
+    )
+    now_ms = time.time() * 1000
+    hours = np.maximum(0.0, (close_times - now_ms) / 3_600_000)
+    return np.where(close_times > 0, hours, np.nan)
+
+
+# Every label categorize_market can return, indexed by [activity][certainty]
+_CATEGORIES = tuple(
+    tuple(
+        sys.intern(f"{activity}-activity-{certainty}")
+        for certainty in ('unlikely', 'uncertain', 'likely')
+    )
+    for activity in ('low', 'medium', 'high')
+)
+
+
+def categorize_market(market: Union[Dict[str, Any], MarketView]) -> str:
     """
     Categorize market by characteristics
     
     Args:
-        market: Market data dictionary
+        market: Market data dictionary or view
     
     Returns:
         Category string
     """
-    num_traders = market.get('uniqueBettorCount', 0)
-    volume = market.get('volume', 0)
-    probability = market.get('probability', 0.5)
+    market = as_market_view(market)
+    num_traders = market.num_traders
+    volume = market.volume
+    probability = market.probability
     
     # Categorize by activity level
     if num_traders < 5 and volume < 500:
-        activity = "low"
+        activity = 0  # low
     elif num_traders < 20 and volume < 2000:
-        activity = "medium"
+        activity = 1  # medium
     else:
-        activity = "high"
+        activity = 2  # high
     
     # Categorize by probability
     if probability < 0.3:
-        certainty = "unlikely"
+        certainty = 0  # unlikely
     elif probability < 0.7:
-        certainty = "uncertain"
+        certainty = 1  # uncertain
     else:
-        certainty = "likely"
+        certainty = 2  # likely
     
-    return f"{activity}-activity-{certainty}"
+    return _CATEGORIES[activity][certainty]
 
 
-def extract_market_features(market: Dict[str, Any], history: List[Dict]) -> Dict[str, Any]:
+def extract_market_features(
+    market: Union[Dict[str, Any], MarketView],
+    history: List[Dict]
+) -> Dict[str, Any]:
     """
     Extract useful features from market data
     
     Args:
-        market: Market data dictionary
+        market: Market data dictionary or view
         history: Probability history
     
     Returns:
         Dictionary of extracted features
     """
+    # Convert once; the helpers below take the view as is
+    market = as_market_view(market)
+    volatility = calculate_volatility(history)
+    
     return {
-        'id': market.get('id'),
-        'question': market.get('question'),
-        'probability': market.get('probability', 0.5),
-        'volume': market.get('volume', 0),
+        'id': market.id,
+        'question': market.question,
+        'probability': market.probability,
+        'volume': market.volume,
         'liquidity': calculate_liquidity_score(market),
-        'num_traders': market.get('uniqueBettorCount', 0),
-        'volatility': calculate_volatility(history),
-        'efficiency': calculate_market_efficiency(market, history),
+        'num_traders': market.num_traders,
+        'volatility': volatility,
+        'efficiency': calculate_market_efficiency(market, volatility=volatility),
         'time_to_close': get_time_to_close(market),
         'category': categorize_market(market),
     }
\ No newline at end of file
@@ -0,0 +1,56 @@
+"""
+Typed, compact view of a market
+Built once per market from the raw API dictionary
+"""
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, Union
+
+
+@dataclass
+class MarketView:
+    """
+    The market fields the strategies and analyzers read, as plain attributes
+    
+    Reading an attribute skips the hashing and default handling of the
+    market.get(...) chains on the raw dictionary.
+    """
+    # Explicit slots (dataclass(slots=True) needs Python 3.10)
+    __slots__ = (
+        'id', 'question', 'probability', 'volume', 'num_traders', 'yes_pool', 'no_pool',
+        'close_time_ms', 'question_lc', 'description_lc'
+    )
+    
+    id: Optional[str]
+    question: Optional[str]
+    probability: float
+    volume: float
+    num_traders: int
+    yes_pool: float
+    no_pool: float
+    close_time_ms: Optional[int]  # None when the market has no close time
+    question_lc: str  # Lower-cased question
+    description_lc: str  # Lower-cased description
+    
+    @classmethod
+    def from_raw(cls, market: Dict[str, Any]) -> 'MarketView':
+        """Build a view from a raw market dictionary, with the same defaults the dict lookups used"""
+        pool = market.get('pool', {})
+        return cls(
+            id=market.get('id'),
+            question=market.get('question'),
+            probability=market.get('probability', 0.5),
+            volume=market.get('volume', 0),
+            num_traders=market.get('uniqueBettorCount', 0),
+            yes_pool=pool.get('YES', 0),
+            no_pool=pool.get('NO', 0),
+            close_time_ms=market.get('closeTime') or None,
+            question_lc=(market.get('question') or '').lower(),
+            description_lc=(market.get('description') or '').lower(),
+        )
+
+
+def as_market_view(market: Union[Dict[str, Any], MarketView]) -> MarketView:
+    """Return the market as a MarketView, converting a raw dictionary if needed"""
+    if isinstance(market, MarketView):
+        return market
+    return MarketView.from_raw(market)
\ No newline at end of file
@@ -0,0 +1,45 @@
+"""
+JSON serialization helpers
+Uses orjson when installed, falling back to the standard library
+"""
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+
+def json_dumps(obj: Any, indent: bool = False) -> bytes:
+    """
+    Serialize an object to JSON bytes
+    
+    Args:
+        obj: Object to serialize
+        indent: Pretty-print with 2-space indentation
+    
+    Returns:
+        UTF-8 encoded JSON
+    """
+    if HAS_ORJSON:
+        option = orjson.OPT_SERIALIZE_NUMPY
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+    
+    return json.dumps(obj, indent=2 if indent else None).encode('utf-8')
+
+
+def json_loads(data: Union[bytes, str]) -> Any:
+    """
+    Deserialize JSON bytes or text
+    
+    Raises:
+        json.JSONDecodeError: If the data is not valid JSON
+    """
+    if HAS_ORJSON:
+        return orjson.loads(data)
+    
+    return json.loads(data)
\ No newline at end of file
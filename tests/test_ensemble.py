@@ -2,11 +2,6 @@
 Unit tests for Strategy Ensemble
 """
 import pytest
-import sys
-from pathlib import Path
-
-# Add src directory to path
-sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
 
 from ensemble import StrategyEnsemble
 from strategies.momentum_strategy import MomentumStrategy
@@ -89,6 +84,75 @@ class TestStrategyEnsemble:
             assert signal.direction == 'NO'
             assert signal.probability < 0.90
     
+    def test_analyze_batch_matches_single(self):
+        """Test batch analysis agrees with per-market analysis"""
+        strategies = [MomentumStrategy(), ContrarianStrategy()]
+        ensemble = StrategyEnsemble(strategies)
+        
+        markets = [
+            {'id': 'high', 'probability': 0.90, 'volume': 1000, 'uniqueBettorCount': 10},
+            {'id': 'mid', 'probability': 0.50, 'volume': 1000, 'uniqueBettorCount': 10},
+            {'id': 'low', 'probability': 0.08, 'volume': 1000, 'uniqueBettorCount': 10}
+        ]
+        contexts = [{} for _ in markets]
+        
+        batch = ensemble.analyze_batch(markets, contexts)
+        
+        assert len(batch) == len(markets)
+        for market, signal in zip(markets, batch):
+            single = ensemble.analyze(market)
+            if single is None:
+                assert signal is None
+            else:
+                assert signal.direction == single.direction
+                assert signal.probability == pytest.approx(single.probability)
+                assert signal.reasoning == single.reasoning
+    
+    def test_analyze_batch_min_edge(self):
+        """Test markets without enough edge are dropped"""
+        ensemble = StrategyEnsemble([ContrarianStrategy()])
+        market = {'id': 'high', 'probability': 0.90, 'volume': 1000, 'uniqueBettorCount': 10}
+        
+        signal = ensemble.analyze(market)
+        assert signal is not None
+        
+        edge = abs(signal.probability - market['probability'])
+        assert ensemble.analyze_batch([market], [{}], min_edge=edge + 0.01) == [None]
+    
+    def test_analyze_batch_return_grid(self):
+        """Test the individual strategy signals are returned alongside the consensus"""
+        ensemble = StrategyEnsemble([MomentumStrategy(), ContrarianStrategy()])
+        markets = [
+            {'id': 'high', 'probability': 0.90, 'volume': 1000, 'uniqueBettorCount': 10},
+            {'id': 'even', 'probability': 0.50, 'volume': 1000, 'uniqueBettorCount': 10}
+        ]
+        
+        signals, grid = ensemble.analyze_batch(markets, [{}, {}], return_grid=True)
+        
+        assert signals == ensemble.analyze_batch(markets, [{}, {}])
+        assert len(grid) == len(markets)
+        assert set(grid[0]) == {'Contrarian'}
+        assert grid[0]['Contrarian'] == ensemble.strategies['Contrarian'].analyze(markets[0])
+        assert grid[1] == {}
+    
+    def test_update_weights_fits_outcomes(self):
+        """Test weights are fitted to resolved outcomes once enough trades exist"""
+        strategies = [MomentumStrategy(), ContrarianStrategy()]
+        ensemble = StrategyEnsemble(strategies)
+        
+        # Momentum predicts outcomes perfectly, contrarian is always wrong
+        for outcome in [True, False, True, False]:
+            ensemble.record_outcome(
+                {'Momentum Trader': 0.9 if outcome else 0.1,
+                 'Contrarian': 0.1 if outcome else 0.9},
+                outcome
+            )
+        
+        ensemble.update_weights(ensemble.get_strategy_performance())
+        
+        assert ensemble.weights['Momentum Trader'] > ensemble.weights['Contrarian']
+        assert sum(ensemble.weights.values()) == pytest.approx(1.0)
+    
     def test_strategy_performance_tracking(self):
         """Test getting strategy performance"""
         strategies = [MomentumStrategy(), ContrarianStrategy()]
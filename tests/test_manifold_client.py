@@ -0,0 +1,164 @@
+"""
+Unit tests for the Manifold API client (no network: requests are stubbed)
+"""
+import pytest
+
+from manifold_client import ManifoldClient
+
+
+def _bet(ts, prob):
+    return {'createdTime': ts, 'probAfter': prob, 'amount': 10, 'outcome': 'YES'}
+
+
+class FakeBets:
+    """Stands in for get_bets, serving queued pages newest first and recording the cursors"""
+    
+    def __init__(self, pages):
+        self.pages = list(pages)
+        self.calls = []
+    
+    def __call__(self, market_id, limit=100, after_time=None):
+        self.calls.append(after_time)
+        return self.pages.pop(0)
+
+
+class FakeResponse:
+    
+    def __init__(self, status_code, content=b'', headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+    
+    def raise_for_status(self):
+        pass
+
+
+class FakeSession:
+    """Stands in for the shared requests session, recording the headers sent"""
+    
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.sent_headers = []
+    
+    def request(self, method, url, headers=None, **kwargs):
+        self.sent_headers.append(headers)
+        return self.responses.pop(0)
+
+
+@pytest.fixture
+def client():
+    return ManifoldClient('test-key', base_url='https://example.invalid')
+
+
+class TestProbabilityHistory:
+    
+    def test_first_fetch(self, client, monkeypatch):
+        """Test the first fetch asks for all bets and returns them oldest first"""
+        bets = FakeBets([[_bet(3000, 0.6), _bet(2000, 0.55), _bet(1000, 0.5)]])
+        monkeypatch.setattr(client, 'get_bets', bets)
+        
+        history = client.get_market_probability_history('m1')
+        
+        assert bets.calls == [None]
+        assert [h['timestamp'] for h in history] == [1000, 2000, 3000]
+        assert [h['probability'] for h in history] == [0.5, 0.55, 0.6]
+    
+    def test_incremental_append(self, client, monkeypatch):
+        """Test later fetches only ask for newer bets and append them"""
+        bets = FakeBets([
+            [_bet(2000, 0.55), _bet(1000, 0.5)],
+            [_bet(4000, 0.7), _bet(3000, 0.6)]
+        ])
+        monkeypatch.setattr(client, 'get_bets', bets)
+        
+        client.get_market_probability_history('m1')
+        history = client.get_market_probability_history('m1')
+        
+        assert bets.calls == [None, 2000]
+        assert [h['timestamp'] for h in history] == [1000, 2000, 3000, 4000]
+    
+    def test_empty_delta(self, client, monkeypatch):
+        """Test a fetch with no new bets returns the cached history unchanged"""
+        bets = FakeBets([[_bet(2000, 0.55), _bet(1000, 0.5)], [], []])
+        monkeypatch.setattr(client, 'get_bets', bets)
+        
+        first = client.get_market_probability_history('m1')
+        second = client.get_market_probability_history('m1')
+        third = client.get_market_probability_history('m1')
+        
+        # The cursor doesn't move when nothing new arrives
+        assert bets.calls == [None, 2000, 2000]
+        assert second == third == first
+    
+    def test_full_page_resets(self, client, monkeypatch):
+        """Test a full page of new bets replaces the cache, since bets in between may be missing"""
+        monkeypatch.setattr(client, 'HISTORY_LIMIT', 3)
+        # A full page where one bet carries no probability, so the cap alone
+        # wouldn't drop the old points
+        bets = FakeBets([
+            [_bet(2000, 0.55), _bet(1000, 0.5)],
+            [_bet(9000, 0.9), _bet(8000, 0.8), {'createdTime': 7000, 'amount': 5}]
+        ])
+        monkeypatch.setattr(client, 'get_bets', bets)
+        
+        client.get_market_probability_history('m1')
+        history = client.get_market_probability_history('m1')
+        
+        assert [h['timestamp'] for h in history] == [8000, 9000]
+        assert client._hist_last_ts['m1'] == 9000
+    
+    def test_history_limit_cap(self, client, monkeypatch):
+        """Test the merged history keeps only the most recent HISTORY_LIMIT points"""
+        monkeypatch.setattr(client, 'HISTORY_LIMIT', 3)
+        bets = FakeBets([
+            [_bet(2000, 0.55), _bet(1000, 0.5)],
+            [_bet(4000, 0.7), _bet(3000, 0.6)]
+        ])
+        monkeypatch.setattr(client, 'get_bets', bets)
+        
+        client.get_market_probability_history('m1')
+        history = client.get_market_probability_history('m1')
+        
+        assert [h['timestamp'] for h in history] == [2000, 3000, 4000]
+
+
+class TestRequestCaching:
+    
+    def test_etag_not_modified(self, client):
+        """Test a 304 reply to If-None-Match returns the previously parsed body"""
+        client.session = FakeSession([
+            FakeResponse(200, b'[{"id": "m1"}]', {'ETag': '"v1"'}),
+            FakeResponse(304)
+        ])
+        
+        first = client._request('GET', '/v0/markets', cache_key='markets')
+        second = client._request('GET', '/v0/markets', cache_key='markets')
+        
+        assert first == second == [{'id': 'm1'}]
+        assert 'If-None-Match' not in client.session.sent_headers[0]
+        assert client.session.sent_headers[1]['If-None-Match'] == '"v1"'
+    
+    def test_user_cache_ttl(self, client, monkeypatch):
+        """Test user lookups are cached until the TTL passes or a refresh is asked for"""
+        calls = []
+        
+        def fake_request(method, endpoint, **kwargs):
+            calls.append(endpoint)
+            return {'id': 'u1', 'balance': 100 + len(calls)}
+        
+        monkeypatch.setattr(client, '_request', fake_request)
+        
+        client._get_user('someone')
+        client._get_user('someone')
+        assert len(calls) == 1
+        
+        assert client.get_user_balance('someone') == 102
+        assert len(calls) == 2
+        
+        client.user_cache_ttl = 0
+        client._get_user('someone')
+        assert len(calls) == 3
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
\ No newline at end of file
@@ -0,0 +1,34 @@
+"""
+Unit tests for market analysis utilities
+"""
+import pytest
+import numpy as np
+
+from utils import market_analyzer
+from utils.market_analyzer import calculate_volatility, _volatility_loop
+
+
+class TestVolatility:
+    
+    def test_history_formats(self):
+        """Test a list of history points and a probability array give the same volatility"""
+        probs = [0.50, 0.52, 0.49, 0.55, 0.60]
+        history = [{'probability': p, 'timestamp': i} for i, p in enumerate(probs)]
+        
+        assert calculate_volatility(history) == pytest.approx(calculate_volatility(np.array(probs)))
+        assert calculate_volatility(history[:1]) == 0.0
+    
+    def test_volatility_kernel_matches_numpy(self, monkeypatch):
+        """Test the Numba kernel's loop logic against the NumPy implementation"""
+        # Force the NumPy path for the expected side, or with Numba installed
+        # the kernel would be compared with itself
+        monkeypatch.setattr(market_analyzer, 'HAS_NUMBA', False)
+        
+        rng = np.random.default_rng(0)
+        for n in [2, 3, 10, 100]:
+            probs = rng.random(n)
+            assert _volatility_loop(probs) == pytest.approx(calculate_volatility(probs))
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
\ No newline at end of file
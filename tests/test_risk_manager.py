@@ -2,16 +2,43 @@
 Unit tests for Risk Manager
 """
 import pytest
-import sys
-from pathlib import Path
-
-# Add src directory to path
-sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
 
+import risk_manager
 from risk_manager import RiskManager
 from strategies.base_strategy import StrategySignal
 
 
+# Market priced at even odds, shared read-only by the sizing tests
+EVEN_MARKET = {'probability': 0.50, 'volume': 1000}
+BALANCE = 1000
+
+
+# Function-scoped: sizing caches the balance and positions mutate state
+@pytest.fixture
+def rm():
+    return RiskManager(max_bet_amount=100, min_bet_amount=10)
+
+
+@pytest.fixture
+def rm_portfolio():
+    return RiskManager(max_bet_amount=100, min_bet_amount=10, max_portfolio_risk=0.30)
+
+
+# Signals are frozen, so one instance per distinct set of fields is shared across tests
+@pytest.fixture(scope="module")
+def signal_factory():
+    cache = {}
+    
+    def make(**fields):
+        key = tuple(sorted(fields.items()))
+        signal = cache.get(key)
+        if signal is None:
+            signal = cache[key] = StrategySignal(**fields)
+        return signal
+    
+    return make
+
+
 class TestRiskManager:
     
     def test_risk_manager_creation(self):
@@ -26,61 +53,80 @@ class TestRiskManager:
         assert rm.min_bet_amount == 10
         assert rm.kelly_fraction == 0.25
     
-    def test_bet_size_calculation_yes(self):
-        """Test bet size calculation for YES bet"""
-        rm = RiskManager(max_bet_amount=100, min_bet_amount=10)
-        
-        signal = StrategySignal(
-            probability=0.70,
+    # Market underpriced for the YES case, overpriced for the NO case
+    @pytest.mark.parametrize("probability,direction", [(0.70, 'YES'), (0.30, 'NO')])
+    def test_bet_size_calculation(self, rm, signal_factory, probability, direction):
+        """Test bet size calculation for YES and NO bets"""
+        signal = signal_factory(
+            probability=probability,
             confidence=0.80,
-            direction='YES',
+            direction=direction,
             reasoning='Test',
             strength=0.75
         )
         
-        market = {
-            'probability': 0.50,  # Market underpriced
-            'volume': 1000
-        }
-        
-        balance = 1000
-        bet_size = rm.calculate_bet_size(signal, market, balance)
+        bet_size = rm.calculate_bet_size(signal, EVEN_MARKET, BALANCE)
         
         # Should return a bet size
         assert bet_size is not None
         assert bet_size >= rm.min_bet_amount
         assert bet_size <= rm.max_bet_amount
     
-    def test_bet_size_calculation_no(self):
-        """Test bet size calculation for NO bet"""
-        rm = RiskManager(max_bet_amount=100, min_bet_amount=10)
-        
-        signal = StrategySignal(
-            probability=0.30,
-            confidence=0.80,
-            direction='NO',
-            reasoning='Test',
-            strength=0.75
-        )
-        
-        market = {
-            'probability': 0.50,  # Market overpriced
-            'volume': 1000
-        }
-        
-        balance = 1000
-        bet_size = rm.calculate_bet_size(signal, market, balance)
-        
-        # Should return a bet size
-        assert bet_size is not None
-        assert bet_size >= rm.min_bet_amount
-        assert bet_size <= rm.max_bet_amount
+    def test_portfolio_bet_sizes(self, rm, signal_factory):
+        """Test sizing several markets at once"""
+        signals = [
+            signal_factory(probability=0.75, confidence=0.8, direction='YES',
+                           reasoning='Undervalued', strength=0.7),
+            signal_factory(probability=0.30, confidence=0.8, direction='NO',
+                           reasoning='Overvalued', strength=0.7),
+            signal_factory(probability=0.52, confidence=0.8, direction='YES',
+                           reasoning='No edge', strength=0.7)
+        ]
+        markets = [
+            {'id': 'yes_market', 'probability': 0.50},
+            {'id': 'no_market', 'probability': 0.60},
+            {'id': 'flat_market', 'probability': 0.50}
+        ]
+        
+        sizes = rm.calculate_portfolio_bet_sizes(signals, markets, BALANCE)
+        
+        assert set(sizes) == {'yes_market', 'no_market'}
+        for size in sizes.values():
+            assert 10 <= size <= 100
+        assert sum(sizes.values()) <= rm.max_portfolio_risk * BALANCE
+    
+    # default: whichever path is installed; numpy: the fallback; loop: the kernel's
+    # logic run as plain Python, so it is checked even without Numba
+    @pytest.mark.parametrize("path", ['default', 'numpy', 'loop'])
+    def test_bet_sizes_batch(self, rm, signal_factory, monkeypatch, path):
+        """Test batch sizing matches sizing each signal on its own"""
+        if path == 'numpy':
+            monkeypatch.setattr(risk_manager, 'HAS_NUMBA', False)
+        elif path == 'loop':
+            monkeypatch.setattr(risk_manager, 'HAS_NUMBA', True)
+            monkeypatch.setattr(risk_manager, '_bet_sizes_kernel', risk_manager._bet_sizes_loop, raising=False)
+        
+        signals = [
+            signal_factory(probability=probability, confidence=confidence, direction=direction,
+                           reasoning='Test', strength=0.75)
+            for probability, direction in ((0.70, 'YES'), (0.30, 'NO'), (0.51, 'YES'), (0.45, 'YES'))
+            for confidence in (0.90, 0.30)
+        ]
+        markets = [EVEN_MARKET, {'probability': 0.9995}] * (len(signals) // 2)
+        
+        expected = [rm.calculate_bet_size(s, m, BALANCE) for s, m in zip(signals, markets)]
+        assert rm.calculate_bet_sizes_batch(signals, markets, BALANCE) == expected
+        assert any(size is not None for size in expected)
+        
+        # Bets are capped by the remaining risk budget (300 - 280)
+        rm_limited = RiskManager(max_bet_amount=100, min_bet_amount=10, max_portfolio_risk=0.30)
+        rm_limited.add_position({'market_id': 'market1', 'amount': 280})
+        sizes = rm_limited.calculate_bet_sizes_batch(signals[:1], [EVEN_MARKET], BALANCE)
+        assert sizes == [rm_limited.calculate_bet_size(signals[0], EVEN_MARKET, BALANCE)] == [20]
     
-    def test_insufficient_edge(self):
+    def test_insufficient_edge(self, rm, signal_factory):
         """Test that small edge doesn't trigger bet"""
-        rm = RiskManager(max_bet_amount=100, min_bet_amount=10)
-        
-        signal = StrategySignal(
+        signal = signal_factory(
             probability=0.51,  # Only 1% edge
             confidence=0.80,
             direction='YES',
@@ -88,22 +134,14 @@ class TestRiskManager:
             strength=0.50
         )
         
-        market = {
-            'probability': 0.50,
-            'volume': 1000
-        }
-        
-        balance = 1000
-        bet_size = rm.calculate_bet_size(signal, market, balance)
+        bet_size = rm.calculate_bet_size(signal, EVEN_MARKET, BALANCE)
         
         # Should not bet with such small edge
         assert bet_size is None
     
-    def test_low_confidence(self):
+    def test_low_confidence(self, rm, signal_factory):
         """Test that low confidence reduces bet size"""
-        rm = RiskManager(max_bet_amount=100, min_bet_amount=10)
-        
-        signal_high = StrategySignal(
+        signal_high = signal_factory(
             probability=0.70,
             confidence=0.90,
             direction='YES',
@@ -111,7 +149,7 @@ class TestRiskManager:
             strength=0.75
         )
         
-        signal_low = StrategySignal(
+        signal_low = signal_factory(
             probability=0.70,
             confidence=0.30,
             direction='YES',
@@ -119,43 +157,52 @@ class TestRiskManager:
             strength=0.75
         )
         
-        market = {
-            'probability': 0.50,
-            'volume': 1000
-        }
-        
-        balance = 1000
-        
-        bet_high = rm.calculate_bet_size(signal_high, market, balance)
-        bet_low = rm.calculate_bet_size(signal_low, market, balance)
+        bet_high = rm.calculate_bet_size(signal_high, EVEN_MARKET, BALANCE)
+        bet_low = rm.calculate_bet_size(signal_low, EVEN_MARKET, BALANCE)
         
         # Higher confidence should result in larger bet (or low conf returns None)
         if bet_low is not None:
             assert bet_high > bet_low
     
-    def test_portfolio_risk_limits(self):
+    def test_portfolio_risk_limits(self, rm_portfolio):
         """Test portfolio risk limits"""
-        rm = RiskManager(
-            max_bet_amount=100,
-            max_portfolio_risk=0.30
-        )
+        rm = rm_portfolio
         
         # Add some positions
         rm.add_position({'market_id': 'market1', 'amount': 200})
         rm.add_position({'market_id': 'market2', 'amount': 100})
         
-        balance = 1000
-        
         # Should limit orders when at risk limit
-        should_limit = rm.should_limit_orders(balance)
+        should_limit = rm.should_limit_orders(BALANCE)
         
         # 300 / 1000 = 30% (at limit)
         assert should_limit == True
     
-    def test_position_tracking(self):
-        """Test adding and removing positions"""
-        rm = RiskManager()
+    def test_cheap_reject(self, rm_portfolio):
+        """Test the data fetch is skipped once the risk budget can't fit a minimum bet"""
+        rm = rm_portfolio
+        
+        assert rm.cheap_reject(BALANCE) == False
         
+        # 295 of 300 allowed: not enough room for a minimum bet
+        rm.add_position({'market_id': 'market1', 'amount': 295})
+        assert rm.cheap_reject(BALANCE) == True
+    
+    def test_update_balance(self, rm_portfolio):
+        """Test the cached risk budget follows the balance"""
+        rm = rm_portfolio
+        rm.add_position({'market_id': 'market1', 'amount': 250})
+        
+        rm.update_balance(BALANCE)
+        assert rm.should_limit_orders(BALANCE) == False
+        assert rm.cheap_reject(BALANCE) == False
+        
+        # A smaller balance passed directly still refreshes the budget
+        assert rm.should_limit_orders(500) == True
+        assert rm.cheap_reject(500) == True
+    
+    def test_position_tracking(self, rm):
+        """Test adding and removing positions"""
         assert len(rm.open_positions) == 0
         
         rm.add_position({'market_id': 'market1', 'amount': 100})
@@ -168,20 +215,23 @@ class TestRiskManager:
         assert len(rm.open_positions) == 1
         
         # Verify correct position was removed
-        assert rm.open_positions[0]['market_id'] == 'market2'
+        assert list(rm.open_positions) == ['market2']
+        assert rm.open_positions['market2']['amount'] == 50
+        assert rm.get_portfolio_metrics(BALANCE)['total_exposure'] == 50
+        
+        # Every position must carry its amount
+        with pytest.raises(ValueError):
+            rm.add_position({'market_id': 'market3'})
     
-    def test_portfolio_metrics(self):
+    def test_portfolio_metrics(self, rm):
         """Test portfolio metrics calculation"""
-        rm = RiskManager()
-        
         rm.add_position({'market_id': 'market1', 'amount': 100})
         rm.add_position({'market_id': 'market2', 'amount': 50})
         
-        balance = 1000
-        metrics = rm.get_portfolio_metrics(balance)
+        metrics = rm.get_portfolio_metrics(BALANCE)
         
         assert metrics['total_exposure'] == 150
-        assert metrics['exposure_ratio'] == 0.15
+        assert metrics['exposure_ratio'] == pytest.approx(0.15)
         assert metrics['num_positions'] == 2
         assert metrics['avg_position_size'] == 75
         assert metrics['available_capital'] == 850
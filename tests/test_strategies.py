@@ -2,15 +2,45 @@
 Unit tests for trading strategies
 """
 import pytest
-import sys
-from pathlib import Path
-
-# Add src directory to path
-sys.path.insert(0, str(Path(__file__).parent.parent / 'src'))
+import numpy as np
+from dataclasses import astuple
+from types import MappingProxyType
 
+from strategies import momentum_strategy
 from strategies.base_strategy import StrategySignal
-from strategies.momentum_strategy import MomentumStrategy
+from strategies.momentum_strategy import MomentumStrategy, _indicators_loop
 from strategies.contrarian_strategy import ContrarianStrategy
+from strategies.llm_strategy import LLMStrategy
+from strategies.sentiment_strategy import SentimentStrategy
+from strategies.value_strategy import ValueStrategy
+from utils.market_view import MarketView
+
+
+# Shared market shapes, built once and read-only so no test can alter another's input
+_MARKET_TRENDING = MappingProxyType({
+    'id': 'test_market',
+    'question': 'Test question?',
+    'probability': 0.65,
+    'volume': 1000
+})
+
+# Upward trending probability history
+_UPWARD_HISTORY = tuple(
+    {'probability': prob, 'timestamp': 1000 * (i + 1)}
+    for i, prob in enumerate((0.50, 0.52, 0.55, 0.58, 0.60, 0.62, 0.65))
+)
+
+_MARKET_EXTREME_HI = MappingProxyType({
+    'id': 'test_market',
+    'question': 'Test question?',
+    'probability': 0.90,
+    'volume': 1000,
+    'uniqueBettorCount': 10
+})
+
+_MARKET_EXTREME_LO = MappingProxyType({**_MARKET_EXTREME_HI, 'probability': 0.10})
+
+_MARKET_NORMAL = MappingProxyType({**_MARKET_EXTREME_HI, 'probability': 0.50})
 
 
 class TestMomentumStrategy:
@@ -18,26 +48,9 @@ class TestMomentumStrategy:
     def test_upward_momentum(self):
         """Test detection of upward momentum"""
         strategy = MomentumStrategy()
+        market = _MARKET_TRENDING
         
-        market = {
-            'id': 'test_market',
-            'question': 'Test question?',
-            'probability': 0.65,
-            'volume': 1000
-        }
-        
-        # Create upward trending probability history
-        prob_history = [
-            {'probability': 0.50, 'timestamp': 1000},
-            {'probability': 0.52, 'timestamp': 2000},
-            {'probability': 0.55, 'timestamp': 3000},
-            {'probability': 0.58, 'timestamp': 4000},
-            {'probability': 0.60, 'timestamp': 5000},
-            {'probability': 0.62, 'timestamp': 6000},
-            {'probability': 0.65, 'timestamp': 7000},
-        ]
-        
-        signal = strategy.analyze(market, probability_history=prob_history)
+        signal = strategy.analyze(market, probability_history=_UPWARD_HISTORY)
         
         assert signal is not None
         assert signal.direction == 'YES'
@@ -60,60 +73,190 @@ class TestMomentumStrategy:
         
         signal = strategy.analyze(market, probability_history=prob_history)
         assert signal is None
+    
+    def test_history_buffer(self):
+        """Test the bounded history buffer keeps only the lookback window"""
+        strategy = MomentumStrategy()
+        buffer = strategy.make_history_buffer()
+        
+        for i in range(50):
+            buffer.append({'probability': 0.30 + i * 0.01, 'timestamp': i})
+        
+        assert len(buffer) == max(max(strategy.lookback_periods), strategy.rsi_period + 1)
+        
+        # The buffer works anywhere a history list does
+        assert buffer[0]['timestamp'] == 50 - len(buffer)
+        assert strategy._calculate_rsi(buffer) == strategy._calculate_rsi(list(buffer))
+        assert strategy._probs(buffer).tolist() == [h['probability'] for h in buffer]
+    
+    def test_indicator_wrappers_accept_history_dicts(self):
+        """Test the single-indicator helpers still take a list of history points"""
+        strategy = MomentumStrategy()
+        history = list(_UPWARD_HISTORY)
+        y = strategy._probs(history)
+        
+        momentum, rsi, trend_strength = strategy._compute_indicators(y)
+        assert strategy._calculate_momentum(history) == pytest.approx(momentum)
+        assert strategy._calculate_trend_strength(history) == pytest.approx(trend_strength)
+        assert strategy._calculate_momentum(y) == strategy._calculate_momentum(history)
+        assert strategy._calculate_trend_strength(y) == strategy._calculate_trend_strength(history)
+        assert momentum > 0
+    
+    def test_indicator_kernel_matches_numpy(self, monkeypatch):
+        """Test the Numba kernel's loop logic against the NumPy implementation"""
+        strategy = MomentumStrategy()
+        
+        # Force the NumPy path for the expected side, or with Numba installed
+        # the kernel would be compared with itself
+        monkeypatch.setattr(momentum_strategy, 'HAS_NUMBA', False)
+        
+        rng = np.random.default_rng(0)
+        for n in [0, 1, 2, 5, 15, 30]:
+            y = rng.random(n)
+            expected = strategy._compute_indicators(y)
+            actual = _indicators_loop(
+                y, strategy._lookbacks_arr, strategy.rsi_period, strategy._weights_arr
+            )
+            assert actual == pytest.approx(expected)
 
 
 class TestContrarianStrategy:
     
-    def test_extreme_high_probability(self):
-        """Test contrarian signal at extreme high probability"""
+    @pytest.mark.parametrize("market,direction", [
+        (_MARKET_EXTREME_HI, 'NO'),
+        (_MARKET_EXTREME_LO, 'YES'),
+    ], ids=['high', 'low'])
+    def test_extreme_probability(self, market, direction):
+        """Test contrarian signal at extreme high and low probability"""
         strategy = ContrarianStrategy()
         
-        market = {
-            'id': 'test_market',
-            'question': 'Test question?',
-            'probability': 0.90,
-            'volume': 1000,
-            'uniqueBettorCount': 10
-        }
-        
         signal = strategy.analyze(market)
         
         assert signal is not None
-        assert signal.direction == 'NO'
-        assert signal.probability < market['probability']
+        assert signal.direction == direction
+        # Expect reversion away from the extreme
+        if direction == 'NO':
+            assert signal.probability < market['probability']
+        else:
+            assert signal.probability > market['probability']
+    
+    def test_min_strength_early_exit(self):
+        """Test that signals too weak to reach min_strength are skipped"""
+        market = _MARKET_EXTREME_HI
+        
+        # Gap of 0.05 above the threshold can reach at most 0.04 strength
+        assert ContrarianStrategy(min_strength=0.03).analyze(market) is not None
+        assert ContrarianStrategy(min_strength=0.3).analyze(market) is None
     
-    def test_extreme_low_probability(self):
-        """Test contrarian signal at extreme low probability"""
+    def test_normal_probability(self):
+        """Test that no signal is generated at normal probabilities"""
         strategy = ContrarianStrategy()
         
-        market = {
-            'id': 'test_market',
-            'question': 'Test question?',
-            'probability': 0.10,
-            'volume': 1000,
-            'uniqueBettorCount': 10
-        }
+        signal = strategy.analyze(_MARKET_NORMAL)
+        assert signal is None
+
+
+class TestLLMStrategy:
+    
+    def test_parse_response(self):
+        """Test parsing a formatted LLM response with multi-line reasoning"""
+        strategy = LLMStrategy()
         
-        signal = strategy.analyze(market)
+        response = (
+            "Here is my analysis:\n\n"
+            "PROBABILITY: 0.65\n"
+            "CONFIDENCE: 0.75\n"
+            "DIRECTION: yes\n"
+            "REASONING: Historical data shows this happens often.\n"
+            "The market is underpricing it.\n"
+            "STRENGTH: 0.8\n"
+        )
+        
+        signal = strategy._parse_response(response, current_prob=0.50)
         
         assert signal is not None
+        assert signal.probability == 0.65
+        assert signal.confidence == 0.75
         assert signal.direction == 'YES'
-        assert signal.probability > market['probability']
+        assert signal.reasoning == (
+            'Historical data shows this happens often. The market is underpricing it.'
+        )
+        assert signal.strength == 0.8
     
-    def test_normal_probability(self):
-        """Test that no signal is generated at normal probabilities"""
-        strategy = ContrarianStrategy()
+    def test_parse_response_validation(self):
+        """Test out-of-range values are clamped and bad directions rejected"""
+        strategy = LLMStrategy()
+        
+        response = "PROBABILITY: 1.5\nCONFIDENCE: -0.2\nDIRECTION: YES\nREASONING: Sure\nSTRENGTH: 2"
+        signal = strategy._parse_response(response, current_prob=0.50)
+        
+        assert signal.probability == 1.0
+        assert signal.confidence == 0.0
+        assert signal.strength == 1.0
+        
+        response = "PROBABILITY: 0.6\nCONFIDENCE: 0.7\nDIRECTION: MAYBE\nREASONING: Unsure"
+        assert strategy._parse_response(response, current_prob=0.50) is None
+    
+    def test_parse_response_missing_fields(self):
+        """Test that incomplete responses produce no signal"""
+        strategy = LLMStrategy()
+        
+        signal = strategy._parse_response("PROBABILITY: 0.3\nDIRECTION: NO", current_prob=0.50)
+        assert signal is None
+
+
+class TestSentimentStrategy:
+    
+    def test_keyword_counts(self):
+        """Test keywords match whole words and phrases match anywhere"""
+        strategy = SentimentStrategy()
+        
+        # 'no' inside 'know' and 'will' inside 'willing' do not count
+        assert strategy._count_keywords("i know they're willing") == (0, 0)
+        assert strategy._count_keywords("yes, likely. no!") == (2, 1)
+        # "won't" as a word plus the "won't happen" phrase
+        assert strategy._count_keywords("it won't happen") == (0, 2)
+    
+    def test_analyze_batch_matches_analyze(self):
+        """Test batched analysis gives the same signals as per-market analysis"""
+        strategy = SentimentStrategy()
+        
+        markets = [{'probability': 0.2}, {'probability': 0.5}, {'probability': 0.9}]
+        contexts = [
+            {
+                'comments': [{'text': 'yes, definitely likely'}] * 5,
+                'bets': [{'amount': 50, 'outcome': 'YES'}, {'amount': 10, 'outcome': 'NO'}]
+            },
+            {'comments': [{'text': 'yes'}]},  # Too few comments
+            {'comments': [{'text': 'no, wrong'}, {'text': 'unlikely'}, {'text': 'hmm'}]},
+        ]
+        
+        batch = strategy.analyze_batch(markets, contexts)
+        single = [strategy.analyze(m, **c) for m, c in zip(markets, contexts)]
+        
+        assert batch[1] is None
+        assert batch[0] is not None and batch[2] is not None
+        for b, s in zip(batch, single):
+            assert b == s
+
+
+class TestValueStrategy:
+    
+    def test_market_view(self):
+        """Test analysis is the same from a raw market and from a prebuilt view"""
+        strategy = ValueStrategy()
         
         market = {
             'id': 'test_market',
-            'question': 'Test question?',
-            'probability': 0.50,
-            'volume': 1000,
-            'uniqueBettorCount': 10
+            'probability': 0.90,
+            'uniqueBettorCount': 6,
+            'pool': {'YES': 150, 'NO': 250}
         }
         
         signal = strategy.analyze(market)
-        assert signal is None
+        assert signal is not None
+        assert signal.direction == 'NO'
+        assert strategy.analyze(market, view=MarketView.from_raw(market)) == signal
 
 
 class TestStrategySignal:
@@ -128,7 +271,8 @@ class TestStrategySignal:
             strength=0.75
         )
         
-        assert signal.weighted_probability == 0.70 * 0.80
+        # Tolerant compare, so a reordered or fused multiply can't fail it spuriously
+        assert signal.weighted_probability == pytest.approx(0.70 * 0.80, rel=1e-12)
     
     def test_signal_creation(self):
         """Test creating a signal"""
@@ -140,11 +284,8 @@ class TestStrategySignal:
             strength=0.80
         )
         
-        assert signal.probability == 0.65
-        assert signal.confidence == 0.75
-        assert signal.direction == 'NO'
-        assert 'overvalued' in signal.reasoning.lower()
-        assert signal.strength == 0.80
+        # Compared in field order, so a reordered field fails here too
+        assert astuple(signal) == (0.65, 0.75, 'NO', 'Market overvalued', 0.80)
 
 
 if __name__ == '__main__':
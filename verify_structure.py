@@ -4,7 +4,13 @@ Verify Repository File Structure
 Checks that all required files exist
 """
 import os
-from pathlib import Path
+import sys
+from io import StringIO
+from typing import Dict, List, Optional, Set, Tuple
+
+# Repository root, resolved once; paths are handled as plain strings so the
+# script never needs to import pathlib
+_PKG_ROOT = os.path.dirname(os.path.realpath(__file__))
 
 # Define expected file structure
 REQUIRED_STRUCTURE = {
@@ -51,10 +57,20 @@ REQUIRED_STRUCTURE = {
     ],
 }
 
+# (category, filepath) pairs in display order, flattened once at import
+_FLAT_REQUIRED = tuple(
+    (category, filepath)
+    for category, files in REQUIRED_STRUCTURE.items()
+    for filepath in files
+)
+
+# Written after a passing run; holds the newest mtime among the required files
+_CACHE_FILE = '.verify_structure_cache'
+
 OPTIONAL_FILES = {
     'Data Directory': [
         'data/performance.json',
-        'data/trades.json',
+        'data/trades.jsonl',
     ],
     'Notebooks': [
         'notebooks/',
@@ -62,129 +78,279 @@ OPTIONAL_FILES = {
 }
 
 
-def check_file(filepath: str, base_path: Path) -> bool:
-    """Check if a file exists"""
-    full_path = base_path / filepath
+def _dir_entries(
+    directory: str,
+    dir_contents: Dict[str, Dict[str, Optional[bool]]]
+) -> Dict[str, Optional[bool]]:
+    """
+    Names in a directory mapped to whether each is a directory, listed once per run
+    
+    Symlinks map to None: they may dangle, so only the filesystem can say.
+    """
+    entries = dir_contents.get(directory)
+    if entries is None:
+        try:
+            with os.scandir(directory) as it:
+                entries = {entry.name: None if entry.is_symlink() else entry.is_dir() for entry in it}
+        except (FileNotFoundError, NotADirectoryError):
+            entries = {}
+        dir_contents[directory] = entries
+    return entries
+
+
+def _exists_on_disk(filepath: str, base_path: str) -> bool:
+    """Check a path with the filesystem itself; a trailing '/' requires a directory"""
+    path = os.path.join(base_path, filepath)
+    if filepath.endswith('/'):
+        return os.path.isdir(path)
+    return os.path.exists(path)
+
+
+def check_file(
+    filepath: str,
+    base_path: str,
+    dir_contents: Optional[Dict[str, Dict[str, Optional[bool]]]] = None
+) -> bool:
+    """
+    Check if a file exists
+    
+    Pass the same dir_contents dict across calls to list each parent
+    directory only once instead of stat'ing every path.
+    """
+    if dir_contents is None:
+        dir_contents = {}
+    
+    parent, _, name = filepath.rstrip('/').rpartition('/')
+    is_dir = _dir_entries(os.path.join(base_path, parent), dir_contents).get(name)
+    
+    # Not listed under this exact name (a case-insensitive filesystem may still
+    # match another spelling) or a symlink: ask the filesystem, only on a miss
+    if is_dir is None:
+        return _exists_on_disk(filepath, base_path)
     
     # If it ends with '/', treat as directory
     if filepath.endswith('/'):
-        return full_path.is_dir()
+        return is_dir
     
-    return full_path.exists()
+    return True
 
 
-def verify_structure(base_path: Path = None):
-    """Verify the repository structure"""
+def verify_structure(
+    base_path: Optional[str] = None,
+    use_cache: bool = True,
+    existing: Optional[Set[str]] = None
+):
+    """
+    Verify the repository structure
+    
+    With use_cache, a run where every required file is present and none has
+    been modified since the last passing run reports success without the
+    full listing. existing, the path set from _scan_tree, replaces the
+    per-directory listings when the tree has already been walked.
+    """
+    
+    base_path = _PKG_ROOT if base_path is None else os.fspath(base_path)
     
-    if base_path is None:
-        base_path = Path(__file__).parent
+    # Collect the report and write it in one go rather than line by line
+    out = StringIO()
     
-    print("=" * 70)
-    print("Repository File Structure Verification")
-    print("=" * 70)
-    print(f"\nBase path: {base_path}\n")
+    print("=" * 70, file=out)
+    print("Repository File Structure Verification", file=out)
+    print("=" * 70, file=out)
+    print(f"\nBase path: {base_path}\n", file=out)
     
     all_good = True
     missing_files = []
+    dir_contents = {}
+    
+    def exists(filepath: str) -> bool:
+        if existing is not None:
+            # Set lookups are case-sensitive, so a miss is confirmed on disk as in check_file
+            return filepath in existing or _exists_on_disk(filepath, base_path)
+        return check_file(filepath, base_path, dir_contents)
+    
+    # Modification time of each required file that exists
+    present = {}
+    for _, filepath in _FLAT_REQUIRED:
+        if exists(filepath):
+            present[filepath] = os.stat(os.path.join(base_path, filepath)).st_mtime
+    
+    cache_path = os.path.join(base_path, _CACHE_FILE)
+    stamp = repr(max(present.values(), default=0.0))
+    if use_cache and len(present) == len(_FLAT_REQUIRED):
+        try:
+            with open(cache_path) as f:
+                cached = f.read()
+            if cached == stamp:
+                print("✓ All required files present (unchanged since last passing run)", file=out)
+                sys.stdout.write(out.getvalue())
+                return True
+        except FileNotFoundError:
+            pass
     
     # Check required files
-    for category, files in REQUIRED_STRUCTURE.items():
-        print(f"\n{category}:")
-        print("-" * 70)
+    last_category = None
+    for category, filepath in _FLAT_REQUIRED:
+        if category != last_category:
+            print(f"\n{category}:", file=out)
+            print("-" * 70, file=out)
+            last_category = category
         
-        for filepath in files:
-            exists = check_file(filepath, base_path)
-            status = "✓" if exists else "✗"
-            
-            if exists:
-                print(f"  {status} {filepath}")
-            else:
-                print(f"  {status} {filepath} [MISSING]")
-                all_good = False
-                missing_files.append(filepath)
+        found = filepath in present
+        status = "✓" if found else "✗"
+        
+        if found:
+            print(f"  {status} {filepath}", file=out)
+        else:
+            print(f"  {status} {filepath} [MISSING]", file=out)
+            all_good = False
+            missing_files.append(filepath)
     
     # Check optional files
-    print("\n\nOptional Files:")
-    print("-" * 70)
+    print("\n\nOptional Files:", file=out)
+    print("-" * 70, file=out)
     
     for category, files in OPTIONAL_FILES.items():
-        print(f"\n{category}:")
+        print(f"\n{category}:", file=out)
         for filepath in files:
-            exists = check_file(filepath, base_path)
-            status = "✓" if exists else "-"
-            print(f"  {status} {filepath}")
+            status = "✓" if exists(filepath) else "-"
+            print(f"  {status} {filepath}", file=out)
     
     # Summary
-    print("\n" + "=" * 70)
+    print("\n" + "=" * 70, file=out)
     if all_good:
-        print("✓ All required files present!")
+        print("✓ All required files present!", file=out)
+        if use_cache:
+            with open(cache_path, 'w') as f:
+                f.write(stamp)
     else:
-        print(f"✗ Missing {len(missing_files)} required file(s):")
+        print(f"✗ Missing {len(missing_files)} required file(s):", file=out)
         for f in missing_files:
-            print(f"  - {f}")
-    print("=" * 70)
+            print(f"  - {f}", file=out)
+    print("=" * 70, file=out)
     
     # Create missing directories if needed
     if not all_good:
-        print("\n" + "=" * 70)
-        print("Creating Missing Files/Directories")
-        print("=" * 70)
-        
-        # Create data directory
-        data_dir = base_path / 'data'
-        if not data_dir.exists():
-            data_dir.mkdir(parents=True, exist_ok=True)
-            print(f"✓ Created: {data_dir}")
+        print("\n" + "=" * 70, file=out)
+        print("Creating Missing Files/Directories", file=out)
+        print("=" * 70, file=out)
         
-        # Create notebooks directory
-        notebooks_dir = base_path / 'notebooks'
-        if not notebooks_dir.exists():
-            notebooks_dir.mkdir(parents=True, exist_ok=True)
-            print(f"✓ Created: {notebooks_dir}")
+        # Create data and notebooks directories; creating directly instead of
+        # checking first is one syscall and can't race with another process
+        data_dir = os.path.join(base_path, 'data')
+        for directory in (data_dir, os.path.join(base_path, 'notebooks')):
+            try:
+                os.makedirs(directory)
+                print(f"✓ Created: {directory}", file=out)
+            except FileExistsError:
+                pass
         
-        # Create empty performance.json
-        perf_file = data_dir / 'performance.json'
-        if not perf_file.exists():
-            perf_file.write_text('{}')
-            print(f"✓ Created: {perf_file}")
-        
-        # Create empty trades.json
-        trades_file = data_dir / 'trades.json'
-        if not trades_file.exists():
-            trades_file.write_text('[]')
-            print(f"✓ Created: {trades_file}")
+        # Create empty performance.json and trades.jsonl ('x' only creates missing files)
+        for data_file, content in ((os.path.join(data_dir, 'performance.json'), '{}'),
+                                   (os.path.join(data_dir, 'trades.jsonl'), '')):
+            try:
+                with open(data_file, 'x') as f:
+                    f.write(content)
+                print(f"✓ Created: {data_file}", file=out)
+            except FileExistsError:
+                pass
     
+    sys.stdout.write(out.getvalue())
     return all_good
 
 
-def count_lines_of_code(base_path: Path = None):
-    """Count lines of Python code"""
+# Directories never searched for source files
+_EXCLUDED_DIRS = frozenset({'venv', '.venv', '.git', 'build', 'dist', '__pycache__', 'node_modules'})
+
+
+def _scan_tree(base_path: str) -> Tuple[Set[str], List[str]]:
+    """
+    Walk the tree once for both the structure check and the line count
     
-    if base_path is None:
-        base_path = Path(__file__).parent
+    Excluded directories are recorded but not descended into. Symlinked
+    directories are followed when they point outside base_path, each target
+    at most once so link cycles end; targets inside base_path are walked at
+    their real location anyway. Dangling symlinks are left out.
     
-    print("\n" + "=" * 70)
-    print("Lines of Code Statistics")
-    print("=" * 70)
+    Returns:
+        (relative paths of every entry, with directories also listed with a
+        trailing '/'; full paths of the Python files)
+    """
+    existing = set()
+    py_files = []
+    base_real = os.path.realpath(base_path)
+    followed = set()
+    stack = [(base_path, '')]
+    while stack:
+        directory, prefix = stack.pop()
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                rel = prefix + entry.name
+                if entry.is_dir():
+                    existing.add(rel)
+                    existing.add(rel + '/')
+                    if entry.name in _EXCLUDED_DIRS:
+                        continue
+                    if entry.is_symlink():
+                        target = os.path.realpath(entry.path)
+                        inside = target == base_real or target.startswith(base_real + os.sep)
+                        if inside or target in followed:
+                            continue
+                        followed.add(target)
+                    stack.append((entry.path, rel + '/'))
+                elif not entry.is_symlink() or os.path.exists(entry.path):
+                    existing.add(rel)
+                    if entry.name.endswith('.py'):
+                        py_files.append(entry.path)
+    return existing, py_files
+
+
+def _count_lines(path) -> int:
+    """Count lines by streaming newline bytes, without decoding or splitting the file"""
+    lines = 0
+    last = b''
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            lines += chunk.count(b'\n')
+            last = chunk
+    # A final line without a trailing newline still counts, as with splitlines()
+    if last and not last.endswith(b'\n'):
+        lines += 1
+    return lines
+
+
+def count_lines_of_code(base_path: Optional[str] = None, py_files: Optional[List[str]] = None):
+    """Count lines of Python code, in py_files if the tree has already been walked"""
+    
+    base_path = _PKG_ROOT if base_path is None else os.fspath(base_path)
+    
+    out = StringIO()
+    
+    print("\n" + "=" * 70, file=out)
+    print("Lines of Code Statistics", file=out)
+    print("=" * 70, file=out)
     
     total_lines = 0
     file_counts = {}
     
-    for py_file in base_path.rglob('*.py'):
-        # Skip venv and other non-source directories
-        if any(part in py_file.parts for part in ['venv', '.venv', 'build', 'dist', '.git']):
-            continue
-        
+    strategies_dir = f'{os.sep}strategies{os.sep}'
+    src_dir = f'{os.sep}src{os.sep}'
+    
+    if py_files is None:
+        py_files = _scan_tree(base_path)[1]
+    
+    for py_file in py_files:
         try:
-            lines = len(py_file.read_text(encoding='utf-8').splitlines())
+            lines = _count_lines(py_file)
             total_lines += lines
             
             # Categorize
-            if 'test' in py_file.name:
+            head, name = os.path.split(py_file)
+            if 'test' in name:
                 category = 'Tests'
-            elif 'strategies' in py_file.parts:
+            elif strategies_dir in py_file:
                 category = 'Strategies'
-            elif py_file.parent.name == 'src':
+            elif (head + os.sep).endswith(src_dir):
                 category = 'Core'
             else:
                 category = 'Other'
@@ -192,30 +358,33 @@ def count_lines_of_code(base_path: Path = None):
             if category not in file_counts:
                 file_counts[category] = []
             
-            file_counts[category].append((py_file.name, lines))
+            file_counts[category].append((name, lines))
         except Exception as e:
-            print(f"Error reading {py_file}: {e}")
+            print(f"Error reading {py_file}: {e}", file=out)
     
     for category in sorted(file_counts.keys()):
-        print(f"\n{category}:")
+        print(f"\n{category}:", file=out)
         for name, lines in sorted(file_counts[category]):
-            print(f"  {name:30s} {lines:5d} lines")
+            print(f"  {name:30s} {lines:5d} lines", file=out)
+    
+    print("\n" + "-" * 70, file=out)
+    print(f"Total Python Code: {total_lines:,} lines", file=out)
+    print("=" * 70, file=out)
     
-    print("\n" + "-" * 70)
-    print(f"Total Python Code: {total_lines:,} lines")
-    print("=" * 70)
+    sys.stdout.write(out.getvalue())
 
 
 if __name__ == '__main__':
-    import sys
+    base_path = _PKG_ROOT
     
-    base_path = Path(__file__).parent
+    # One walk serves both the structure check and the line count
+    existing, py_files = _scan_tree(base_path)
     
     # Verify structure
-    all_good = verify_structure(base_path)
+    all_good = verify_structure(base_path, existing=existing)
     
     # Count lines
-    count_lines_of_code(base_path)
+    count_lines_of_code(base_path, py_files=py_files)
     
     # Exit code
     sys.exit(0 if all_good else 1)
\ No newline at end of file